@@ -1,9 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import json
+import queue
+import threading
 from email_service import EmailService
 from grant_agent import GrantAgent
+from custom_portia_tools import custom_browser_tool, custom_extract_tool
+from grant_portals import all_known_portals
+from job_queue import JobManager
 
 # Load environment variables from root directory
 load_dotenv('../.env')
@@ -14,6 +20,11 @@ CORS(app)  # Enable CORS for all routes
 # Initialize services
 email_service = EmailService()
 grant_agent = GrantAgent()
+# Searches submitted via /jobs run on their own bounded pool, off the request threads
+search_jobs = JobManager(grant_agent.find_grants)
+
+# Longest a GET /jobs/<id>?wait= request may block
+MAX_JOB_WAIT_SEC = 30
 
 @app.route('/', methods=['GET'])
 def home():
@@ -25,7 +36,13 @@ def home():
 
 @app.route('/process-input', methods=['POST'])
 def process_input():
-    """Process user input using AI Grant Agent"""
+    """
+    Process user input using AI Grant Agent.
+    An optional 'time_budget_sec' in the body caps the search's latency (unlimited by default,
+    or SEARCH_TIME_BUDGET_SEC). The response's metadata.time_budget reports it as
+    {budget_sec (null when unlimited), elapsed_sec, truncated_stages}; a non-empty
+    truncated_stages means the budget ran out and the grants are partial results.
+    """
     try:
         data = request.get_json()
         
@@ -45,6 +62,85 @@ def process_input():
         print(f"❌ Process input error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/process-input/stream', methods=['POST'])
+def process_input_stream():
+    """
+    Streaming variant of /process-input.
+    Emits newline-delimited JSON events (or Server-Sent Events when the client
+    accepts text/event-stream): 'grants' as each portal finishes (or a single
+    'catalog' when the local catalog answers), 'ranked' once scoring is done,
+    then 'clarification' and a final 'done' with the full result.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    mode = data.get('mode', 'form')
+    use_sse = 'text/event-stream' in request.headers.get('Accept', '')
+    events = queue.Queue()
+    finished = object()
+    
+    def search():
+        try:
+            agent_result = grant_agent.find_grants(data, mode, on_event=lambda kind, payload: events.put((kind, payload)))
+            events.put(('clarification', {'clarification': agent_result.get('clarification')}))
+            events.put(('done', agent_result))
+        except Exception as e:
+            print(f"❌ Streaming process input error: {str(e)}")
+            events.put(('error', {'error': str(e)}))
+        finally:
+            events.put(finished)
+    
+    def format_event(kind, payload):
+        if use_sse:
+            return f"event: {kind}\ndata: {json.dumps(payload, default=str)}\n\n"
+        return json.dumps({'type': kind, 'data': payload}, default=str) + "\n"
+    
+    def generate():
+        while True:
+            item = events.get()
+            if item is finished:
+                break
+            yield format_event(*item)
+    
+    threading.Thread(target=search, name='search-stream', daemon=True).start()
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs', methods=['POST'])
+def submit_search_job():
+    """Queue a grant search (same body as /process-input) and return its job id immediately"""
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    job = search_jobs.submit(data, data.get('mode', 'form'))
+    if job is None:
+        response = jsonify({'error': 'Too many searches queued, please retry shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    
+    job['status_url'] = f"/jobs/{job['job_id']}"
+    response = jsonify(job)
+    response.headers['Location'] = job['status_url']
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_search_job(job_id):
+    """Job status and, once done, the same result /process-input returns; ?wait=SEC long-polls"""
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT_SEC)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    
+    job = search_jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job)
+
 @app.route('/send-email', methods=['POST'])
 def send_email():
     """Send grant digest email to user"""
@@ -91,9 +187,10 @@ def handle_clarification():
         original_query = data.get('original_query', {})
         clarification_choice = data.get('clarification_choice')
         
-        # Modify query based on clarification and re-run search
-        modified_query = grant_agent.apply_clarification(original_query, clarification_choice)
-        agent_result = grant_agent.find_grants(modified_query, data.get('mode', 'form'))
+        # Narrow the previous search's grants, or re-run the search for widening choices
+        agent_result = grant_agent.refine_search(
+            data.get('session_id'), original_query, clarification_choice, data.get('mode', 'form')
+        )
         
         return jsonify(agent_result)
         
@@ -105,5 +202,46 @@ def handle_clarification():
 def health_check():
     return jsonify({'status': 'healthy'})
 
+@app.route('/health/portals', methods=['GET'])
+def portal_health():
+    """Circuit state, p50/p95 latency and failure counts for every known portal"""
+    breaker = custom_browser_tool.breaker
+    if not breaker:
+        return jsonify({'error': 'Circuit breaker is disabled'}), 404
+    
+    portals = []
+    for portal in all_known_portals():
+        snapshot = breaker.snapshot(portal['url'])
+        snapshot.update(name=portal['name'], url=portal['url'])
+        portals.append(snapshot)
+    states = [portal['state'] for portal in portals]
+    return jsonify({
+        'status': 'degraded' if 'open' in states else 'healthy',
+        'open': states.count('open'),
+        'half_open': states.count('half_open'),
+        'portals': portals
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose cache counters for scraping by monitoring"""
+    llm_cache = getattr(getattr(grant_agent, 'llm_client', None), 'cache', None)
+    return jsonify({
+        'http_cache': custom_browser_tool.cache.stats() if custom_browser_tool.cache else None,
+        'llm_cache': llm_cache.stats() if llm_cache else None,
+        'grant_catalog': grant_agent.catalog.stats() if grant_agent.catalog else None,
+        'result_cache': grant_agent.result_cache.stats() if grant_agent.result_cache else None,
+        'search_sessions': grant_agent.sessions.stats() if grant_agent.sessions else None,
+        'jobs': search_jobs.stats(),
+        'render_policy': custom_browser_tool.render_policy.stats(),
+        'extraction': custom_extract_tool.stats(),
+        'extraction_templates': custom_extract_tool.templates.stats() if custom_extract_tool.templates else None,
+        'single_flight': {
+            'searches': grant_agent.inflight_searches.stats(),
+            'fetches': custom_browser_tool.inflight.stats()
+        }
+    })
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Threaded so /health and job polling are served while searches run
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
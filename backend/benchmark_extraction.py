@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Benchmark for CustomExtractTool on real portal pages.
+
+Usage:
+    python benchmark_extraction.py                 # fetch the default grant portals
+    python benchmark_extraction.py page.html URL   # saved HTML files and/or URLs
+
+Each page is timed through the single-pass extractor and through a reference
+implementation that linearizes the document once per field (the previous
+behaviour, field helpers included), and the outputs are compared; differing
+fields are named, since whole-word keyword matching deliberately changed some
+country / sector results. The parser section
+compares BeautifulSoup backends and the old parse-twice pipeline against
+handing the browser tool's tree to the extractor. The field-pattern section
+times amount/deadline extraction on listing items (one search per pattern vs
+the precompiled pattern bank), including a synthetic listing-heavy page.
+"""
+import os
+import re
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse
+
+from custom_portia_tools import custom_browser_tool, custom_extract_tool, HTML_PARSER
+
+DEFAULT_PAGES = [
+    'https://www.grants.gov',
+    'https://www.sbir.gov',
+    'https://www.innovasjonnorge.no',
+    'https://www.startupindia.gov.in',
+    'https://ec.europa.eu/info/funding-tenders',
+    'https://www.grantwatch.com/',
+    'https://www.fundsforngos.org/',
+]
+
+
+def load_pages(sources):
+    """Load (url, html) pairs from saved files or live URLs"""
+    pages = []
+    for source in sources:
+        if source.startswith(('http://', 'https://')):
+            page = custom_browser_tool.navigate_to_url(source)
+            if page.get('success'):
+                pages.append((source, page['content']))
+            else:
+                print(f"⚠️ Skipping {source}: {page.get('error')}")
+        else:
+            with open(source, encoding='utf-8', errors='replace') as f:
+                pages.append((f"https://{os.path.basename(source)}", f.read()))
+    return pages
+
+
+def reference_title(soup):
+    for selector in ['h1', 'h2', '.title', '.grant-title', '.opportunity-title', '.page-title']:
+        elem = soup.select_one(selector)
+        if elem:
+            return elem.get_text(strip=True)
+    return ''
+
+
+def reference_description(soup):
+    for selector in ['.description', '.summary', '.overview', '.about', '.content', '.article-body']:
+        elem = soup.select_one(selector)
+        if elem:
+            t = elem.get_text(strip=True)
+            return (t[:300] + '...') if len(t) > 300 else t
+    p = soup.find('p')
+    if p:
+        t = p.get_text(strip=True)
+        return (t[:300] + '...') if len(t) > 300 else t
+    return ''
+
+
+def reference_single_grant(soup, url):
+    """Previous behaviour: one selector sweep per selector and one document serialization per field"""
+    if not reference_is_single_grant(soup.get_text().lower()):
+        return []
+    grant = {
+        'title': reference_title(soup),
+        'amount': reference_amount(soup.get_text()),
+        'deadline': reference_deadline(soup.get_text()),
+        'eligibility': reference_eligibility(soup.get_text()),
+        'description': reference_description(soup),
+        'apply_link': url,
+        'source': urlparse(url).netloc,
+        'country': reference_country(soup.get_text(), url),
+        'sector': reference_sector(soup.get_text().lower())
+    }
+    return [grant] if grant['title'] else []
+
+
+def reference_is_single_grant(lower):
+    indicators = ['deadline', 'eligibility', 'application', 'funding amount', 'apply now', 'who can apply']
+    return sum(1 for indicator in indicators if indicator in lower) >= 2
+
+
+def reference_eligibility(text):
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if 'eligib' in line.lower():
+            chunk = ' '.join(lines[i:i+3])
+            return (chunk[:200] + '...') if len(chunk) > 200 else chunk
+    return ''
+
+
+REFERENCE_COUNTRY_DOMAINS = {
+    '.no': 'Norway',
+    '.uk': 'United Kingdom',
+    '.ca': 'Canada',
+    '.au': 'Australia',
+    '.de': 'Germany',
+    '.fr': 'France',
+    'grants.gov': 'United States',
+    'sbir.gov': 'United States',
+    'innovasjonnorge': 'Norway',
+    'ec.europa.eu': 'European Union'
+}
+REFERENCE_COUNTRIES = ['United States', 'USA', 'Norway', 'European Union', 'EU', 'United Kingdom', 'UK', 'Canada', 'India']
+
+
+def reference_country(text, url):
+    """Previous behaviour: domain hints, then the first candidate found as a substring"""
+    domain = urlparse(url).netloc.lower()
+    for hint, country in REFERENCE_COUNTRY_DOMAINS.items():
+        if hint in domain:
+            return country
+    lower = text.lower()
+    for c in REFERENCE_COUNTRIES:
+        if c.lower() in lower:
+            return c
+    return 'Global'
+
+
+REFERENCE_SECTORS = {
+    'technology': ['tech', 'software', 'ai', 'digital', 'innovation', 'data'],
+    'healthcare': ['health', 'medical', 'pharma', 'biotech', 'clinical'],
+    'energy': ['energy', 'renewable', 'clean tech', 'sustainability', 'green'],
+    'research': ['research', 'science', 'academic', 'lab'],
+    'manufacturing': ['manufacturing', 'industrial', 'hardware'],
+    'agriculture': ['agriculture', 'farming', 'food', 'agri'],
+    'education': ['education', 'edtech', 'learning'],
+    'fintech': ['fintech', 'financial', 'banking', 'payments'],
+}
+
+
+def reference_sector(lower):
+    """Previous behaviour: first sector with any keyword as a substring"""
+    for sector, kws in REFERENCE_SECTORS.items():
+        if any(k in lower for k in kws):
+            return sector.title()
+    return 'General'
+
+
+def differing_fields(ref, new):
+    """Names of the fields where two extraction results disagree"""
+    if len(ref) != len(new):
+        return ['grant count']
+    return sorted({key for a, b in zip(ref, new) for key in set(a) | set(b) if a.get(key) != b.get(key)})
+
+
+REFERENCE_AMOUNT_PATTERNS = [
+    r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
+    r'€[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
+    r'£[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
+    r'(?:USD|EUR|GBP|NOK)\s*[\d,]+(?:\.\d{2})?',
+    r'[\d,]+\s*(?:USD|EUR|GBP|NOK|dollars?|euros?)',
+]
+REFERENCE_DEADLINE_PATTERNS = [
+    r'\b(?:deadline|due|closes?|expires?)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s*(?:deadline|due)',
+    r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
+    r'\d{4}-\d{2}-\d{2}'
+]
+
+
+def reference_amount(text):
+    """Previous behaviour: one re.search per pattern, in priority order"""
+    for pattern in REFERENCE_AMOUNT_PATTERNS:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            return m.group(0)
+    return ''
+
+
+def reference_deadline(text):
+    for pattern in REFERENCE_DEADLINE_PATTERNS:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            return m.group(1) if m.groups() else m.group(0)
+    return ''
+
+
+def synthetic_listing_page(items=150, seed=7):
+    """Listing page whose items mix every amount and deadline format (and some with neither)"""
+    rng = random.Random(seed)
+    amounts = ['$250,000', 'up to €1.5 million', '£40,000.00', 'NOK 2,000,000', '75,000 USD', '500 euros', '']
+    deadlines = ['Deadline: 03/15/2026', '12/01/2025 due', 'Closes March 3, 2026', '2026-01-31', 'rolling', '']
+    rows = []
+    for i in range(items):
+        body = ' '.join(['Support for early-stage companies developing new products.'] * rng.randint(1, 6))
+        rows.append(
+            f'<div class="grant-item"><h3>Programme {i}</h3><p>{body}</p>'
+            f'<p>Award: {rng.choice(amounts)} (co-funding {rng.choice(amounts)})</p>'
+            f'<p>{rng.choice(deadlines)}; updated {rng.choice(deadlines)}</p></div>'
+        )
+    return '<html><body>' + ''.join(rows) + '</body></html>'
+
+
+def listing_texts(html):
+    """Item texts as the listing extractor sees them: up to 15 elements per selector"""
+    soup = BeautifulSoup(html, 'html.parser')
+    texts = []
+    for selector in custom_extract_tool.LISTING_SELECTORS:
+        for item in soup.select(selector)[:15]:
+            texts.append(item.get_text(separator=' ', strip=True))
+    return texts
+
+
+def benchmark_field_patterns(pages, repeat=5):
+    print(f"\n📊 Amount/deadline patterns on listing items ({repeat} runs, best time)")
+    sources = [('synthetic listing (150 items)', synthetic_listing_page())] + list(pages)
+    for url, html in sources:
+        texts = listing_texts(html)
+        if not texts:
+            continue
+
+        def reference():
+            return [(reference_amount(t), reference_deadline(t)) for t in texts]
+
+        def bank():
+            return [(custom_extract_tool._extract_amount_from_text(t),
+                     custom_extract_tool._extract_deadline_from_text(t)) for t in texts]
+
+        ref_time, ref = time_call(reference, repeat)
+        new_time, new = time_call(bank, repeat)
+        status = '✅' if ref == new else '❌ OUTPUT DIFFERS'
+        print(f"   {url[:50]:<50} {len(texts):5} items  "
+              f"ref {ref_time * 1000:8.2f} ms  bank {new_time * 1000:8.2f} ms  "
+              f"x{ref_time / new_time if new_time else 0:5.2f}  {status}")
+
+
+def time_call(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_single_grant(pages, repeat=5):
+    print(f"\n📊 Single-grant field extraction ({repeat} runs, best time)")
+    total_ref = total_new = 0.0
+    for url, html in pages:
+        soup = BeautifulSoup(html, 'html.parser')
+        ref_time, ref = time_call(lambda: reference_single_grant(soup, url), repeat)
+        new_time, new = time_call(lambda: custom_extract_tool._extract_from_single_grant(soup, url), repeat)
+        total_ref += ref_time
+        total_new += new_time
+        status = '✅' if ref == new else f"❌ OUTPUT DIFFERS ({', '.join(differing_fields(ref, new))})"
+        print(f"   {url[:50]:<50} {len(html) / 1024:7.0f} KB  "
+              f"ref {ref_time * 1000:8.2f} ms  new {new_time * 1000:8.2f} ms  "
+              f"x{ref_time / new_time if new_time else 0:5.2f}  {status}")
+    if total_new:
+        print(f"   {'TOTAL':<50} {'':10}  ref {total_ref * 1000:8.2f} ms  new {total_new * 1000:8.2f} ms  "
+              f"x{total_ref / total_new:5.2f}")
+
+
+def available_parsers():
+    parsers = ['html.parser']
+    for name in ('lxml', 'html5lib'):
+        try:
+            BeautifulSoup('<p></p>', name)
+            parsers.append(name)
+        except Exception:
+            pass
+    return parsers
+
+
+def benchmark_parsers(pages, repeat=3):
+    parsers = available_parsers()
+    print(f"\n📊 Parser backends ({repeat} runs, best time; configured: {HTML_PARSER})")
+    for url, html in pages:
+        timings = []
+        for parser in parsers:
+            parse_time, _ = time_call(lambda: BeautifulSoup(html, parser), repeat)
+            timings.append(f"{parser} {parse_time * 1000:8.2f} ms")
+        print(f"   {url[:50]:<50} " + "  ".join(timings))
+
+    print(f"\n📊 Page pipeline: parse twice (navigate + extract) vs shared tree ({HTML_PARSER})")
+    for url, html in pages:
+        def parse_twice():
+            custom_browser_tool._build_page(url, 200, html)
+            return custom_extract_tool.extract_grant_data({'url': url, 'content': html})
+
+        def parse_once():
+            return custom_extract_tool.extract_grant_data(custom_browser_tool._build_page(url, 200, html))
+
+        twice_time, twice = time_call(parse_twice, repeat)
+        once_time, once = time_call(parse_once, repeat)
+        status = '✅' if twice == once else '❌ OUTPUT DIFFERS'
+        print(f"   {url[:50]:<50} twice {twice_time * 1000:8.2f} ms  once {once_time * 1000:8.2f} ms  "
+              f"x{twice_time / once_time if once_time else 0:5.2f}  {status}")
+
+
+if __name__ == '__main__':
+    pages = load_pages(sys.argv[1:] or DEFAULT_PAGES)
+    if not pages:
+        print("❌ No pages to benchmark")
+        sys.exit(1)
+    benchmark_single_grant(pages)
+    benchmark_field_patterns(pages)
+    benchmark_parsers(pages)
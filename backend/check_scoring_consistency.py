@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Compare batched relevance scoring against the one-call-per-grant mode.
+Scores the verified fallback grants (a stable fixture set) for a few user
+profiles in both modes and reports how far the batched scores drift.
+Needs OPENAI_API_KEY, like the rest of the agent.
+"""
+import copy
+import time
+
+from grant_agent import GrantAgent
+
+FIXTURE_PROFILES = [
+    {'industry': 'AI/ML', 'region': 'Europe', 'stage': 'Seed'},
+    {'industry': 'Healthcare', 'region': 'United States', 'stage': 'Pre-Seed', 'nonDilutiveOnly': True},
+    {'industry': 'Climate', 'region': 'Global', 'stage': 'Growth', 'founderType': 'Student-led'},
+]
+
+
+def score_with_batch_size(agent, grants, user_input, batch_size):
+    agent.score_batch_size = batch_size
+    scored = agent._score_grant_relevance(copy.deepcopy(grants), user_input)
+    return [grant['relevance_score'] for grant in scored]
+
+
+def check_scoring_consistency(batch_size=10, tolerance=15):
+    agent = GrantAgent()
+    if not agent.agent_initialized:
+        print("❌ Grant Agent failed to initialize (is OPENAI_API_KEY set?)")
+        return False
+
+    grants = agent._validate_grant_data(agent._get_verified_fallback_grants())
+    all_ok = True
+    for profile in FIXTURE_PROFILES:
+        start = time.perf_counter()
+        single = score_with_batch_size(agent, grants, profile, 1)
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = score_with_batch_size(agent, grants, profile, batch_size)
+        batched_time = time.perf_counter() - start
+
+        diffs = [abs(a - b) for a, b in zip(single, batched)]
+        ok = max(diffs) <= tolerance
+        all_ok = all_ok and ok
+        print(f"{'✅' if ok else '❌'} {profile}")
+        print(f"   per-grant {single} ({single_time:.2f}s)")
+        print(f"   batched   {batched} ({batched_time:.2f}s)")
+        print(f"   mean |Δ| {sum(diffs) / len(diffs):.1f}, max |Δ| {max(diffs)}")
+    return all_ok
+
+
+if __name__ == '__main__':
+    print("Checking batched vs per-grant relevance scoring...")
+    check_scoring_consistency()
@@ -0,0 +1,135 @@
+"""
+Per-host circuit breaker for portal fetches.
+Each host keeps a sliding window of recent request outcomes and latencies.
+When the window's failure rate crosses a threshold the circuit opens and
+requests to that host are refused outright; after a cool-down one probe is let
+through (half-open) and its outcome closes or re-opens the circuit.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker per host, driven by error rate and slow calls"""
+
+    def __init__(self, failure_rate: Optional[float] = None, min_requests: Optional[int] = None,
+                 window: Optional[int] = None, open_sec: Optional[float] = None,
+                 slow_call_sec: Optional[float] = None):
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+        # Outcomes needed in the window before the failure rate is trusted
+        self.min_requests = min_requests if min_requests is not None else int(os.getenv('CIRCUIT_MIN_REQUESTS', '4'))
+        self.window = window if window is not None else int(os.getenv('CIRCUIT_WINDOW', '20'))
+        # How long an open circuit refuses requests before letting a probe through
+        self.open_sec = open_sec if open_sec is not None else float(os.getenv('CIRCUIT_OPEN_SEC', '60'))
+        # Successful responses slower than this still count as failures
+        self.slow_call_sec = slow_call_sec if slow_call_sec is not None else float(os.getenv('CIRCUIT_SLOW_CALL_SEC', '15'))
+
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> Dict[str, Any]:
+        host = urlparse(url).netloc.lower() or url
+        state = self._hosts.get(host)
+        if state is None:
+            state = {
+                'state': CLOSED,
+                'outcomes': deque(maxlen=self.window),
+                'opened_at': None,
+                'probe_in_flight': False,
+                'requests': 0,
+                'failures': 0,
+                'rejected': 0,
+                'times_opened': 0,
+            }
+            self._hosts[host] = state
+        return state
+
+    def allow(self, url: str) -> bool:
+        """Whether a request to the url's host may go out now (an open circuit lets one probe through after cool-down)"""
+        with self._lock:
+            host = self._host(url)
+            if host['state'] == OPEN and time.monotonic() - host['opened_at'] >= self.open_sec:
+                host['state'] = HALF_OPEN
+                host['probe_in_flight'] = False
+            if host['state'] == CLOSED:
+                return True
+            if host['state'] == HALF_OPEN and not host['probe_in_flight']:
+                host['probe_in_flight'] = True
+                return True
+            host['rejected'] += 1
+            return False
+
+    def record(self, url: str, success: bool, latency: float) -> None:
+        """Record one request outcome; slow successes count as failures"""
+        failed = not success or latency > self.slow_call_sec
+        with self._lock:
+            host = self._host(url)
+            host['requests'] += 1
+            host['failures'] += failed
+            host['outcomes'].append((failed, latency))
+            if host['state'] == HALF_OPEN:
+                host['probe_in_flight'] = False
+                if failed:
+                    self._open_locked(host)
+                else:
+                    # Start the closed window afresh from the successful probe
+                    host['state'] = CLOSED
+                    host['outcomes'].clear()
+                    host['outcomes'].append((failed, latency))
+                return
+            if host['state'] == CLOSED and len(host['outcomes']) >= self.min_requests:
+                failures = sum(1 for outcome in host['outcomes'] if outcome[0])
+                if failures / len(host['outcomes']) >= self.failure_rate:
+                    self._open_locked(host)
+
+    def _open_locked(self, host: Dict[str, Any]) -> None:
+        host['state'] = OPEN
+        host['opened_at'] = time.monotonic()
+        host['times_opened'] += 1
+
+    def snapshot(self, url: str) -> Dict[str, Any]:
+        """State, latency percentiles and failure counts for the url's host"""
+        with self._lock:
+            host = self._host(url)
+            latencies = sorted(outcome[1] for outcome in host['outcomes'])
+            recent_failures = sum(1 for outcome in host['outcomes'] if outcome[0])
+            state = host['state']
+            retry_in = None
+            if state == OPEN:
+                remaining = self.open_sec - (time.monotonic() - host['opened_at'])
+                if remaining <= 0:
+                    # Past the cool-down: allow() would let a probe through, so report it as allow() sees it
+                    state = HALF_OPEN
+                else:
+                    retry_in = round(remaining, 1)
+            return {
+                'state': state,
+                'p50_ms': _percentile_ms(latencies, 0.5),
+                'p95_ms': _percentile_ms(latencies, 0.95),
+                'recent_requests': len(host['outcomes']),
+                'recent_failures': recent_failures,
+                'requests': host['requests'],
+                'failures': host['failures'],
+                'rejected': host['rejected'],
+                'times_opened': host['times_opened'],
+                'retry_in_sec': retry_in,
+            }
+
+
+def _percentile_ms(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 1)
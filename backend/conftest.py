@@ -0,0 +1,19 @@
+"""
+Shared pytest setup: the caches and catalogs open SQLite files in GRANTSCOUT_DATA_DIR
+as soon as their modules are imported, so tests point it at a throwaway directory first.
+"""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault('GRANTSCOUT_DATA_DIR', tempfile.mkdtemp(prefix='grantscout-tests-'))
+
+import storage  # noqa: E402  (reads GRANTSCOUT_DATA_DIR on import)
+
+
+@pytest.fixture
+def data_dir(monkeypatch, tmp_path):
+    """A fresh data directory, so each test's SQLite stores start empty"""
+    monkeypatch.setattr(storage, 'DATA_DIR', str(tmp_path))
+    return tmp_path
@@ -8,12 +8,157 @@ import os
 import json
 import time
 import re
-from typing import Dict, List, Any
-from urllib.parse import urljoin, urlparse, quote_plus
+import codecs
+import hashlib
+import heapq
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Optional
+from urllib.parse import urljoin, urlparse, urlunparse, quote_plus, parse_qsl, urlencode
 
 import requests
 from bs4 import BeautifulSoup
 
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from extraction_templates import ExtractionTemplates
+from http_cache import ResponseCache
+from keyword_matcher import KeywordMatcher, matcher_for_keywords
+from pattern_bank import PatternBank
+from render_policy import RenderPolicy
+from time_budget import TimeBudget
+from singleflight import SingleFlight
+import structured_data
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket keyed by netloc.
+    Each host refills at `rate` tokens/sec up to `burst`; callers waiting on one
+    host never hold up fetches to another. Hosts can also be deferred
+    (Retry-After, retry backoff) without touching other hosts' buckets.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, now: float) -> Dict[str, float]:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = {'tokens': float(self.burst), 'updated': now, 'blocked_until': 0.0}
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """Reserve a request slot for the url's host; sleeps until the slot is due and returns the wait"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            self._refill(bucket, now)
+            # Take a token now; a negative balance is a reservation that we wait off outside the lock.
+            # Reservations queue behind a deferral, so requests leave the block 1/rate apart, not in a burst
+            bucket['tokens'] -= 1
+            wait = max(bucket['blocked_until'] - now, 0.0) + max(-bucket['tokens'], 0.0) / self.rate
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, url: str, seconds: float) -> None:
+        """Hold back all requests to the url's host for `seconds`"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._bucket(host, now)
+            self._refill(bucket, now)
+            bucket['blocked_until'] = max(bucket['blocked_until'], now + seconds)
+
+    def _refill(self, bucket: Dict[str, float], now: float) -> None:
+        """Add the tokens earned since the last update; a deferred host earns none until its block ends"""
+        refill_from = max(bucket['updated'], bucket['blocked_until'])
+        if now > refill_from:
+            bucket['tokens'] = min(self.burst, bucket['tokens'] + (now - refill_from) * self.rate)
+            bucket['updated'] = now
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+# Shared politeness scheduler: one request per host every CRAWL_HOST_INTERVAL_SEC (default 0.8 s)
+host_rate_limiter = HostRateLimiter(rate=1.0 / float(os.getenv('CRAWL_HOST_INTERVAL_SEC', '0.8')))
+
+def _resolve_html_parser(name: str) -> str:
+    """Pick the BeautifulSoup backend, falling back to the stdlib parser if the configured one is missing"""
+    if name == 'html.parser':
+        return name
+    try:
+        BeautifulSoup('<p></p>', name)
+        return name
+    except Exception:
+        print(f"⚠️ HTML parser '{name}' unavailable, falling back to html.parser")
+        return 'html.parser'
+
+
+# BeautifulSoup backend for every page we parse (GRANTSCOUT_HTML_PARSER=lxml is several times faster)
+HTML_PARSER = _resolve_html_parser(os.getenv('GRANTSCOUT_HTML_PARSER', 'html.parser'))
+
+
+def parse_html(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+# Content types worth downloading; everything else is rejected from the response headers
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml'}
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-]+)', re.IGNORECASE)
+
+
+# Shared on-disk page cache (set HTTP_CACHE_ENABLED=0 to always hit the network)
+response_cache = ResponseCache() if os.getenv('HTTP_CACHE_ENABLED', '1') != '0' else None
+
+# Shared per-host circuit breaker (set CIRCUIT_BREAKER_ENABLED=0 to always try the network)
+host_circuit_breaker = CircuitBreaker() if os.getenv('CIRCUIT_BREAKER_ENABLED', '1') != '0' else None
+
+# Learned per-domain listing selectors (set EXTRACTION_TEMPLATES_ENABLED=0 to always run the full sweep)
+extraction_templates = ExtractionTemplates() if os.getenv('EXTRACTION_TEMPLATES_ENABLED', '1') != '0' else None
+
+# Learned per-domain ScraperAPI rendering decisions
+scraper_render_policy = RenderPolicy()
+
+# A plain (unrendered) page with less visible text than this is treated as a JS shell
+MIN_RENDERED_TEXT_CHARS = int(os.getenv('MIN_RENDERED_TEXT_CHARS', '500'))
+RENDER_CONTENT_TERMS = ('grant', 'funding', 'fund', 'apply', 'eligib', 'deadline', 'award', 'programme', 'program')
+
+# Statuses worth retrying; they also count as failures for the circuit breaker
+RETRYABLE_STATUSES = (403, 429, 500, 502, 503, 504)
+
+# Field patterns in priority order (lowercase; the bank matches them case-insensitively)
+AMOUNT_PATTERNS = PatternBank([
+    r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:million|m|thousand|k))?',
+    r'€[\d,]+(?:\.\d{2})?(?:\s*(?:million|m|thousand|k))?',
+    r'£[\d,]+(?:\.\d{2})?(?:\s*(?:million|m|thousand|k))?',
+    r'(?:usd|eur|gbp|nok)\s*[\d,]+(?:\.\d{2})?',
+    r'[\d,]+\s*(?:usd|eur|gbp|nok|dollars?|euros?)',
+], gate=r'[\d,]')
+DEADLINE_PATTERNS = PatternBank([
+    r'\b(?:deadline|due|closes?|expires?)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s*(?:deadline|due)',
+    r'\b(?:january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}',
+    r'\d{4}-\d{2}-\d{2}',
+], gate=r'\d')
+
 
 class CustomBrowserTool:
     """Custom browser tool compatible with Portia framework"""
@@ -21,7 +166,28 @@ class CustomBrowserTool:
     name = "custom_browser_tool"
     description = "Navigate to web pages and extract content using requests + BeautifulSoup (ScraperAPI-aware)"
 
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None, cache: Optional[ResponseCache] = None,
+                 breaker: Optional[CircuitBreaker] = None, render_policy: Optional[RenderPolicy] = None,
+                 revalidate: bool = False):
+        # All fetches go through the per-host politeness scheduler
+        self.rate_limiter = rate_limiter or host_rate_limiter
+        # Cache hits skip the network (and ScraperAPI) entirely
+        self.cache = cache if cache is not None else response_cache
+        # Check cached pages with the origin on every visit instead of serving them (the harvester's mode)
+        self.revalidate = revalidate
+        # Hosts that keep failing are refused outright until a probe succeeds
+        self.breaker = breaker if breaker is not None else host_circuit_breaker
+        # ScraperAPI JS rendering only for domains that turned out to need it
+        self.render_policy = render_policy or scraper_render_policy
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        # Concurrent navigations to the same URL share one fetch
+        self.inflight = SingleFlight()
+        # Longest Retry-After we are willing to wait out before giving up on a URL
+        self.max_retry_after = 30.0
+        # Bodies are streamed and reading stops at this many (decompressed) bytes
+        self.max_page_bytes = int(os.getenv('MAX_PAGE_BYTES', '1000000'))
+
         self.session = requests.Session()
         # Realistic browser headers (helpful even when tunneling via ScraperAPI with keep_headers=true)
         self.session.headers.update({
@@ -39,64 +205,205 @@ class CustomBrowserTool:
         self.scraper_api_key = os.getenv("SCRAPER_API_KEY")
         # ScraperAPI recommends http scheme for simplicity; they handle TLS to the destination.
         self.scraper_endpoint = "http://api.scraperapi.com"
-        # Default ScraperAPI params. You can tweak per-domain later if needed.
+        # Default ScraperAPI params. "render" is decided per domain (see RenderPolicy).
         self.scraper_default_params = {
-            "render": "true",        # JS rendering for modern/JS-heavy portals
             "keep_headers": "true",  # forward our headers downstream
             # Optional geo-targeting example: "country_code": "us",
             # Optional device type example: "device_type": "desktop",
         }
 
-    def _fetch_with_retries(self, url: str, max_retries: int = 3, backoff_sec: float = 1.0):
+    def _fetch_with_retries(self, url: str, max_retries: int = 3, backoff_sec: float = 1.0,
+                            headers: Optional[Dict[str, str]] = None, budget: Optional[TimeBudget] = None,
+                            render: Optional[bool] = None):
         """
         Centralized fetch:
-          - If SCRAPER_API_KEY is set, route via ScraperAPI
+          - If SCRAPER_API_KEY is set, route via ScraperAPI, with JS rendering
+            when `render` is set (None = the domain's learned decision)
           - Otherwise, use plain requests
-          - Retry on typical transient/anti-bot statuses (403/429/5xx)
+          - Every attempt waits for a slot from the per-host rate limiter
+          - Retry on typical transient/anti-bot statuses (403/429/5xx),
+            backing off the host (or honoring Retry-After) via the limiter
+          - Responses are streamed: a 200 comes back with its body unread
+            (consume it with _read_text), anything else is already closed
+          - With a time budget, request timeouts are clamped to the time left
+            and no retry is started that the budget can't cover
+          - Every attempt is reported to the host's circuit breaker; an open
+            circuit raises CircuitOpenError before anything is sent, and
+            stops further retries if it opens midway
         """
+        if render is None:
+            render = bool(self.render_policy.needs_render(url))
         last_exc = None
         for attempt in range(1, max_retries + 1):
+            if budget and budget.expired():
+                budget.truncate('fetch')
+                break
+            if self.breaker and not self.breaker.allow(url):
+                if attempt == 1:
+                    raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}")
+                break
+            self.rate_limiter.acquire(url)
+            started = time.monotonic()
             try:
                 if self.scraper_api_key:
                     params = {
                         "api_key": self.scraper_api_key,
                         "url": url,
                         **self.scraper_default_params,
+                        "render": "true" if render else "false",
                     }
+                    self.render_policy.record('rendered_fetches' if render else 'plain_fetches')
                     query = "&".join([f"{k}={quote_plus(str(v))}" for k, v in params.items()])
                     scraper_url = f"{self.scraper_endpoint}?{query}"
-                    resp = self.session.get(scraper_url, timeout=30)
+                    resp = self.session.get(scraper_url, headers=headers,
+                                            timeout=budget.timeout(30) if budget else 30, stream=True)
                 else:
-                    resp = self.session.get(url, timeout=20)
+                    resp = self.session.get(url, headers=headers,
+                                            timeout=budget.timeout(20) if budget else 20, stream=True)
 
                 status = resp.status_code
+                if self.breaker:
+                    self.breaker.record(url, status not in RETRYABLE_STATUSES, time.monotonic() - started)
                 if status == 200:
                     return resp
-                if status in (403, 429, 500, 502, 503, 504):
-                    # Retryable; exponential-ish backoff
-                    time.sleep(backoff_sec * attempt)
+                # Only status and headers matter from here on; release the connection
+                resp.close()
+                if status in RETRYABLE_STATUSES:
+                    # Retryable; back off this host only, preferring the server's Retry-After
+                    retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                    if retry_after is not None and retry_after > self.max_retry_after:
+                        return resp
+                    delay = retry_after if retry_after is not None else backoff_sec * attempt
+                    if attempt < max_retries and budget and delay >= budget.remaining():
+                        # Waiting out the backoff would overrun the search budget
+                        budget.truncate('fetch_retries')
+                        return resp
+                    if attempt < max_retries:
+                        self.rate_limiter.defer(url, delay)
                     continue
                 # Non-retryable (404, 410, etc.)
                 return resp
 
             except Exception as e:
                 last_exc = e
-                time.sleep(backoff_sec * attempt)
+                if self.breaker:
+                    self.breaker.record(url, False, time.monotonic() - started)
+                if attempt < max_retries:
+                    self.rate_limiter.defer(url, backoff_sec * attempt)
 
         if last_exc:
             raise last_exc
         return None
 
-    def navigate_to_url(self, url: str) -> Dict[str, Any]:
-        """Navigate to a URL and return page content"""
+    def _is_html_response(self, response) -> bool:
+        """Judge the body from its Content-Type header before downloading it"""
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return not content_type or content_type in HTML_CONTENT_TYPES
+
+    def _read_text(self, response) -> str:
+        """
+        Stream the body with an incremental decoder, stopping at max_page_bytes.
+        Peak memory per fetch stays bounded however large the upstream response is.
+        """
+        decoder = None
+        parts = []
+        remaining = self.max_page_bytes
+        try:
+            for chunk in response.iter_content(chunk_size=16384):
+                if not chunk:
+                    continue
+                if decoder is None:
+                    decoder = self._incremental_decoder(response, chunk)
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+                parts.append(decoder.decode(chunk))
+                if remaining <= 0:
+                    print(f"✂️ Truncated {response.url} at {self.max_page_bytes} bytes")
+                    break
+            if decoder is not None:
+                parts.append(decoder.decode(b'', final=True))
+        finally:
+            response.close()
+        return ''.join(parts)
+
+    def _incremental_decoder(self, response, first_chunk: bytes):
+        """Decoder for the declared charset: header first, then <meta charset> in the first chunk, else UTF-8"""
+        encoding = None
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            encoding = response.encoding
+        if not encoding:
+            match = META_CHARSET_RE.search(first_chunk[:4096])
+            if match:
+                encoding = match.group(1).decode('ascii', 'ignore')
+        try:
+            return codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def navigate_to_url(self, url: str, budget: Optional[TimeBudget] = None) -> Dict[str, Any]:
+        """
+        Navigate to a URL and return page content (served from the response cache when fresh).
+        Callers asking for a URL that is already being fetched wait for that fetch instead of
+        starting another; each gets its own page dict (the parsed soup is shared read-only).
+        """
+        # Spellings of the same page ('https://opengrants.io' and 'https://opengrants.io/') share one fetch and cache entry
+        key = canonicalize_url(url)
+        page, _ = self.inflight.do(key, lambda: self._navigate(url, budget, key))
+        return dict(page)
+
+    def _navigate(self, url: str, budget: Optional[TimeBudget] = None, key: Optional[str] = None) -> Dict[str, Any]:
+        key = key or canonicalize_url(url)
         try:
-            via = "via ScraperAPI" if self.scraper_api_key else "(direct)"
+            entry = self.cache.lookup(key) if self.cache else None
+            # A revalidating browser never serves from cache: it sends a conditional request (304 reuses the entry)
+            if entry and entry['state'] == 'fresh' and not self.revalidate:
+                self.cache.record('hits')
+                print(f"💾 Cache hit for {url}")
+                return self._build_page(url, entry['status_code'], entry['text'])
+            if entry and entry['state'] == 'stale' and not self.revalidate:
+                # Serve stale content now, refresh it in the background
+                self.cache.record('stale_hits')
+                print(f"💾 Serving stale cache for {url} (revalidating)")
+                self._revalidate_in_background(url, key, entry)
+                return self._build_page(url, entry['status_code'], entry['text'])
+            if self.cache:
+                self.cache.record('misses')
+
+            # None = domain not probed yet: fetch plain, re-fetch rendered only if the page is a JS shell
+            render = self.render_policy.needs_render(url) if self.scraper_api_key else False
+            via = ("via ScraperAPI" + (" (rendered)" if render else "")) if self.scraper_api_key else "(direct)"
             print(f"🌐 Navigating to {url} {via}")
-            response = self._fetch_with_retries(url)
+            try:
+                response = self._fetch_with_retries(
+                    url, headers=self.cache.conditional_headers(entry) if self.cache else None, budget=budget,
+                    render=bool(render)
+                )
+            except CircuitOpenError as e:
+                return self._circuit_open_page(url, entry, str(e))
 
             if response is None:
                 raise RuntimeError("No response received after retries")
 
+            if response.status_code == 200 and not self._is_html_response(response):
+                # PDFs, images and other binaries are rejected from the headers alone
+                response.close()
+                return {
+                    'url': url,
+                    'title': '',
+                    'status_code': response.status_code,
+                    'content': '',
+                    'links': [],
+                    'forms': [],
+                    'success': False,
+                    'error': f"Unsupported content type: {response.headers.get('Content-Type')}",
+                }
+
+            if response.status_code == 304 and entry:
+                # Expired entry is still valid upstream
+                self.cache.touch(key, response.headers)
+                self.cache.record('revalidated')
+                return self._build_page(url, entry['status_code'], entry['text'])
+
             if response.status_code != 200:
                 # Surface non-200 to the caller so they can decide fallbacks
                 return {
@@ -110,18 +417,13 @@ class CustomBrowserTool:
                     'error': f"HTTP {response.status_code}",
                 }
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            return {
-                'url': url,
-                'title': (soup.title.string if soup.title else 'No title'),
-                'status_code': response.status_code,
-                # allow more content since pages may be fully rendered now
-                'content': response.text[:500000],
-                'links': self._extract_links(soup, url),
-                'forms': self._extract_forms(soup),
-                'success': True
-            }
+            text = self._read_text(response)
+            headers = response.headers
+            if render is None:
+                text, headers = self._probe_render(url, text, headers, budget)
+            if self.cache:
+                self.cache.store(key, response.status_code, text, headers)
+            return self._build_page(url, response.status_code, text)
 
         except Exception as e:
             print(f"❌ Navigation failed: {e}")
@@ -131,6 +433,109 @@ class CustomBrowserTool:
                 'success': False
             }
 
+    def _probe_render(self, url: str, text: str, headers, budget: Optional[TimeBudget] = None):
+        """
+        First fetch for a domain went out unrendered. Keep it when it has real content;
+        otherwise re-fetch with rendering, and remember for the domain whichever worked.
+        Returns the (text, headers) to use.
+        """
+        if not self._needs_js_render(text):
+            self.render_policy.learn(url, False)
+            return text, headers
+
+        print(f"🧩 {urlparse(url).netloc} looks client-rendered, re-fetching with rendering")
+        self.render_policy.record('rerenders')
+        try:
+            response = self._fetch_with_retries(url, budget=budget, render=True)
+        except CircuitOpenError:
+            return text, headers
+        if response is None:
+            return text, headers
+        if response.status_code != 200 or not self._is_html_response(response):
+            response.close()
+            return text, headers
+
+        rendered = self._read_text(response)
+        # Only stick with rendering for this domain if it actually produced content
+        self.render_policy.learn(url, not self._needs_js_render(rendered))
+        return rendered, response.headers
+
+    def _needs_js_render(self, text: str) -> bool:
+        """Heuristic for an unrendered JS shell: little visible text, or no links and no grant vocabulary"""
+        soup = parse_html(text)
+        visible = soup.get_text(' ', strip=True)
+        if len(visible) < MIN_RENDERED_TEXT_CHARS:
+            return True
+        lower = visible.lower()
+        has_links = soup.find('a', href=True) is not None
+        return not has_links and not any(term in lower for term in RENDER_CONTENT_TERMS)
+
+    def _circuit_open_page(self, url: str, entry: Optional[Dict[str, Any]], reason: str) -> Dict[str, Any]:
+        """Skip a host whose circuit is open: serve whatever copy the cache still holds, else fail fast"""
+        if entry:
+            self.cache.record('circuit_fallbacks')
+            print(f"🔌 {reason}, serving cached copy of {url}")
+            return self._build_page(url, entry['status_code'], entry['text'])
+        print(f"🔌 {reason}, skipping {url}")
+        return {
+            'url': url,
+            'title': '',
+            'status_code': None,
+            'content': '',
+            'links': [],
+            'forms': [],
+            'success': False,
+            'circuit_open': True,
+            'error': reason,
+        }
+
+    def _build_page(self, url: str, status_code: int, text: str) -> Dict[str, Any]:
+        """
+        Turn a successful response body into the page dict handed down the pipeline.
+        The parsed tree travels with the page under 'soup' so extraction never re-parses it.
+        """
+        soup = parse_html(text)
+
+        return {
+            'url': url,
+            'title': (soup.title.string if soup.title else 'No title'),
+            'status_code': status_code,
+            # allow more content since pages may be fully rendered now
+            'content': text[:500000],
+            'links': self._extract_links(soup, url),
+            'forms': self._extract_forms(soup),
+            'soup': soup,
+            'success': True
+        }
+
+    def _revalidate_in_background(self, url: str, key: str, entry: Dict[str, Any]) -> None:
+        """Conditionally refetch a stale entry (cached under key) on a daemon thread (at most one refresh per entry)"""
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                response = self._fetch_with_retries(url, headers=self.cache.conditional_headers(entry))
+                if response is None:
+                    return
+                if response.status_code == 304:
+                    self.cache.touch(key, response.headers)
+                    self.cache.record('revalidated')
+                elif response.status_code == 200 and self._is_html_response(response):
+                    self.cache.store(key, response.status_code, self._read_text(response), response.headers)
+                    self.cache.record('refreshed')
+                else:
+                    response.close()
+            except Exception as e:
+                print(f"⚠️ Background revalidation failed for {url}: {e}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, name='cache-revalidate', daemon=True).start()
+
     def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[Dict[str, str]]:
         """Extract links from the page"""
         links = []
@@ -162,35 +567,138 @@ class CustomBrowserTool:
         return forms
 
 
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of the same page compare equal"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and not ((scheme == 'http' and parsed.port == 80) or (scheme == 'https' and parsed.port == 443)):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    # Drop tracking parameters and order the rest so ?a=1&b=2 == ?b=2&a=1
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_')
+    ))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: memory never grows, rare false positives mean a page is skipped"""
+
+    def __init__(self, num_bits: int = 1 << 16, num_hashes: int = 4):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self._bits = bytearray(num_bits // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * self.num_hashes).digest()
+        for i in range(self.num_hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'big') % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class CrawlFrontier:
+    """
+    Best-first URL frontier for a single crawl.
+    Highest-scoring links are popped first (ties keep discovery order); the
+    seen-set is a fixed-size Bloom filter over canonical URLs and the queue is
+    capped at max_size entries, so memory has a hard ceiling.
+    """
+
+    def __init__(self, max_size: int = 200, seen_bits: int = 1 << 16):
+        self.max_size = max_size
+        self._heap = []
+        self._seq = 0
+        self._seen = BloomFilter(num_bits=seen_bits)
+
+    def push(self, url: str, score: float) -> bool:
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (-score, self._seq, url))
+        self._seq += 1
+        if len(self._heap) > self.max_size:
+            # Drop the least promising link (the largest heap entry) so the queue never exceeds max_size
+            worst = max(self._heap)
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            return worst[1] != self._seq - 1
+        return True
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
 class CustomCrawlTool:
     """Custom crawl tool for discovering grant-related pages"""
 
     name = "custom_crawl_tool"
     description = "Crawl websites to discover grant and funding pages"
 
-    def __init__(self):
-        self.browser = CustomBrowserTool()
-        self.visited_urls = set()
-
-    def crawl_for_grants(self, base_url: str, keywords: List[str], max_pages: int = 5) -> List[Dict[str, Any]]:
-        """Crawl a website looking for grant-related pages"""
+    GRANT_INDICATORS = KeywordMatcher([
+        'grant*', 'funding', 'financial support', 'startup funding',
+        'innovation fund*', 'research funding', 'sbir', 'sttr',
+        'seed funding', 'application deadline*', 'eligib*', 'apply now',
+        'funding opportunit*', 'call for proposals', 'tender*', 'scholarship*',
+    ])
+    # Grant terms in anchor text, one category per term so hits are counted once each
+    LINK_TEXT_TERMS = KeywordMatcher({
+        'grant': ['grant*'], 'funding': ['funding'], 'finance': ['financ*'], 'startup': ['startup*'],
+        'innovation': ['innovation*'], 'research': ['research*'], 'sbir': ['sbir'],
+        'call': ['call', 'calls'], 'opportunity': ['opportunit*'],
+    })
+    # URLs glue words together ('/grantsandfunding'), so these match anywhere in the URL
+    LINK_URL_TERMS = KeywordMatcher(
+        ['grant', 'funding', 'finance', 'startup', 'innovation', 'research', 'sbir', 'call', 'opportunit'],
+        whole_words=False,
+    )
+    LINK_NEUTRAL_TERMS = KeywordMatcher(['program*', 'apply', 'eligib*', 'how-to', 'fund*'])
+
+    def __init__(self, browser: Optional[CustomBrowserTool] = None):
+        # Pass the shared browser so crawls reuse its connection pool, cache and in-flight fetches
+        self.browser = browser or CustomBrowserTool()
+
+    def crawl_for_grants(self, base_url: str, keywords: List[str], max_pages: int = 5,
+                         budget: Optional[TimeBudget] = None,
+                         seed_page: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Crawl a website looking for grant-related pages, most promising links first (until the budget runs out).
+        A seed_page already fetched for base_url is used as-is instead of being fetched again.
+        """
         found_pages = []
-        to_visit = [base_url]
+        # Frontier and seen-set are per crawl, so one request never hides pages from another
+        frontier = CrawlFrontier()
+        frontier.push(base_url, float('inf'))
 
         print(f"🕷️ Crawling {base_url} for grant pages...")
 
-        while to_visit and len(found_pages) < max_pages:
-            url = to_visit.pop(0)
-
-            if url in self.visited_urls:
-                continue
-            self.visited_urls.add(url)
-
-            # Navigate to page
-            page_data = self.browser.navigate_to_url(url)
+        while frontier and len(found_pages) < max_pages:
+            if budget and budget.expired():
+                budget.truncate('crawl')
+                break
+            url = frontier.pop()
+
+            if seed_page is not None and url == base_url:
+                page_data = seed_page
+            else:
+                # Navigate to page
+                # Politeness between requests is enforced per host inside the browser tool
+                page_data = self.browser.navigate_to_url(url, budget=budget)
             if not page_data.get('success'):
                 # on hard block/non-200, just skip
-                time.sleep(0.5)
                 continue
 
             # Check if page is grant-related
@@ -198,56 +706,51 @@ class CustomCrawlTool:
                 found_pages.append(page_data)
                 print(f"   ✅ Found grant page: {page_data.get('title', 'No title')}")
 
-            # Add new URLs to visit (same domain & relevant)
-            for link in page_data.get('links', [])[:20]:
-                link_url = link['url']
-                if self._should_visit_link(link_url, link['text'], keywords, base_url):
-                    to_visit.append(link_url)
-
-            time.sleep(0.8)  # be polite; reduce risk of blocks
+            # Queue new URLs to visit (same domain & relevant), ranked by how grant-like they look
+            for link in page_data.get('links', []):
+                score = self._link_score(link['url'], link['text'], keywords, base_url)
+                if score > 0:
+                    frontier.push(link['url'], score)
 
         return found_pages
 
     def _is_grant_related(self, page_data: Dict[str, Any], keywords: List[str]) -> bool:
         """Check if a page is related to grants/funding"""
-        content = page_data.get('content', '').lower()
-        title = page_data.get('title', '').lower()
+        content = page_data.get('content', '')
+        title = page_data.get('title', '')
 
-        grant_indicators = [
-            'grant', 'funding', 'financial support', 'startup funding',
-            'innovation fund', 'research funding', 'sbir', 'sttr',
-            'seed funding', 'application deadline', 'eligibility', 'apply now',
-            'funding opportunities', 'call for proposals', 'tender', 'scholarship',
-        ]
-
-        if any(ind in content or ind in title for ind in grant_indicators):
+        if self.GRANT_INDICATORS.any_in(title) or self.GRANT_INDICATORS.any_in(content):
             return True
 
-        for keyword in keywords:
-            kw = keyword.lower()
-            if kw in content or kw in title:
-                return True
-
-        return False
+        keyword_matcher = matcher_for_keywords(tuple(keywords))
+        return keyword_matcher.any_in(title) or keyword_matcher.any_in(content)
 
     def _should_visit_link(self, url: str, link_text: str, keywords: List[str], base_url: str) -> bool:
         """Determine if a link should be visited"""
+        return self._link_score(url, link_text, keywords, base_url) > 0
+
+    def _link_score(self, url: str, link_text: str, keywords: List[str], base_url: str) -> float:
+        """
+        Score a link for the crawl frontier; 0 means don't visit.
+        Grant terms in the anchor text weigh most, then in the URL, then the
+        query keywords; neutral in-site pages score low to expand the crawl lightly.
+        """
         base_domain = urlparse(base_url).netloc
         link_domain = urlparse(url).netloc
 
         if not link_domain or base_domain not in link_domain:
-            return False
+            return 0.0
 
-        grant_terms = ['grant', 'funding', 'finance', 'startup', 'innovation', 'research', 'sbir', 'call', 'opportunit']
-        text_lower = (link_text or '').lower()
-        url_lower = (url or '').lower()
-
-        if any(term in text_lower or term in url_lower for term in grant_terms):
-            return True
+        score = 2.0 * len(self.LINK_TEXT_TERMS.categories_in(link_text))
+        score += 1.0 * len(self.LINK_URL_TERMS.terms_in(url))
 
         # also allow a few neutral in-site pages to expand crawl lightly
-        neutral_terms = ['program', 'apply', 'eligibility', 'how-to', 'fund']
-        return any(term in text_lower for term in neutral_terms)
+        if not score:
+            return 0.5 if self.LINK_NEUTRAL_TERMS.any_in(link_text) else 0.0
+
+        # Query keywords only re-rank links that already qualify
+        score += 0.5 * len(matcher_for_keywords(tuple(keywords)).categories_in(link_text))
+        return score
 
 
 class CustomExtractTool:
@@ -256,12 +759,45 @@ class CustomExtractTool:
     name = "custom_extract_tool"
     description = "Extract structured grant information from web pages"
 
+    LISTING_SELECTORS = [
+        '.grant-item', '.funding-opportunity', '.opportunity',
+        '.grant-listing', '.fund-item', '[class*="grant"]',
+        '.search-result', '.opportunity-item', '.result-item',
+        'article', 'li.result'
+    ]
+
+    # schema.org types read by the structured-data fast path (Events only when they read as funding calls)
+    STRUCTURED_GRANT_TYPES = ('Grant', 'MonetaryGrant', 'Event')
+    DEADLINE_PROPERTIES = ('applicationDeadline', 'deadline', 'validThrough', 'endDate', 'expires')
+
+    def __init__(self, templates: Optional[ExtractionTemplates] = None):
+        self.templates = templates
+        # Which path pages took, and listing work done and avoided (selectors run, elements skipped by the dedup)
+        self._counters = {'structured_pages': 0, 'heuristic_pages': 0,
+                          'selectors_run': 0, 'elements_matched': 0, 'elements_extracted': 0,
+                          'duplicates_skipped': 0, 'nested_skipped': 0, 'containers_skipped': 0}
+        self._stats_lock = threading.Lock()
+
     def extract_grant_data(self, page_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Extract structured grant data from a page"""
+        """
+        Extract structured grant data from a page.
+        schema.org data (JSON-LD / microdata) is used when present; the selector and
+        regex heuristics only run on pages without it.
+        """
         grants = []
         try:
+            # Reuse the tree parsed by the browser tool; only parse when handed raw content
             content = page_data.get('content', '')
-            soup = BeautifulSoup(content, 'html.parser')
+            soup = page_data.get('soup')
+            if soup is None:
+                soup = parse_html(content)
+
+            if not content or structured_data.may_contain_structured_data(content):
+                grants = self._extract_structured_grants(soup, page_data['url'])
+                if grants:
+                    self._count('structured_pages')
+                    return grants
+            self._count('heuristic_pages')
 
             # Look for grant listings or individual grant pages
             grants.extend(self._extract_from_listings(soup, page_data['url']))
@@ -273,37 +809,167 @@ class CustomExtractTool:
         return grants
 
     def _extract_from_listings(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
-        """Extract grants from listing pages"""
-        grants = []
-        selectors = [
-            '.grant-item', '.funding-opportunity', '.opportunity',
-            '.grant-listing', '.fund-item', '[class*="grant"]',
-            '.search-result', '.opportunity-item', '.result-item',
-            'article', 'li.result'
-        ]
+        """
+        Extract grants from listing pages.
+        A domain's learned template (the selectors that produced grants there before)
+        is tried first; the full selector sweep runs when there is none or it finds nothing.
+        """
+        domain = urlparse(url).netloc.lower()
+        template = self.templates.get(domain) if self.templates else None
+        if template:
+            grants, _ = self._run_listing_selectors(soup, url, template)
+            self.templates.record(domain, hit=bool(grants))
+            if grants:
+                return grants
+
+        grants, productive = self._run_listing_selectors(soup, url, self.LISTING_SELECTORS)
+        if self.templates and productive:
+            # Keep what worked on the domain's other page layouts too, in sweep order
+            known = set(productive) | set(template or [])
+            self.templates.learn(domain, [selector for selector in self.LISTING_SELECTORS if selector in known])
+        return grants
+
+    def _run_listing_selectors(self, soup: BeautifulSoup, url: str, selectors: List[str]):
+        """
+        Run listing selectors in order; returns (grants, selectors that produced a grant).
+        Selectors overlap, so each element is extracted at most once. Matches are then
+        resolved innermost-first: an element wrapping two or more listing items is a
+        container and is skipped, and an element wrapping one item replaces it only
+        when it is the same item (same title), i.e. its richer outer block.
+        """
+        counters = dict.fromkeys(('selectors_run', 'elements_matched', 'elements_extracted',
+                                  'duplicates_skipped', 'nested_skipped', 'containers_skipped'), 0)
+        # Distinct matched elements in selector order, with the first selector that matched each
+        candidates = []
+        seen = set()
         for selector in selectors:
-            items = soup.select(selector)
-            for item in items[:15]:
-                grant = self._extract_grant_from_element(item, url)
-                if grant:
-                    grants.append(grant)
+            counters['selectors_run'] += 1
+            for item in soup.select(selector)[:15]:
+                counters['elements_matched'] += 1
+                if id(item) in seen:
+                    counters['duplicates_skipped'] += 1
+                    continue
+                seen.add(id(item))
+                candidates.append((len(candidates), selector, item))
+
+        # id(element) -> (match order, selector, grant, ancestor ids) for the kept listing items
+        kept = {}
+        # id(element) -> number of kept listing items inside it
+        items_below = {}
+
+        def keep(order, selector, item, grant):
+            ancestors = [id(parent) for parent in item.parents]
+            kept[id(item)] = (order, selector, grant, ancestors)
+            for ancestor in ancestors:
+                items_below[ancestor] = items_below.get(ancestor, 0) + 1
+
+        def drop(item_id):
+            for ancestor in kept.pop(item_id)[3]:
+                items_below[ancestor] -= 1
+
+        # Deepest elements first, so every element sees the listing items inside it
+        for order, selector, item in sorted(candidates, key=lambda c: -len(list(c[2].parents))):
+            inside = items_below.get(id(item), 0)
+            if inside >= 2:
+                counters['containers_skipped'] += 1
+                continue
+            counters['elements_extracted'] += 1
+            grant = self._extract_grant_from_element(item, url)
+            if not grant:
+                continue
+            if inside == 1:
+                inner_id = next(k for k, v in kept.items() if id(item) in v[3])
+                if kept[inner_id][2]['title'] != grant['title']:
+                    # A wrapper with its own heading around one item: keep the item
+                    counters['nested_skipped'] += 1
+                    continue
+                drop(inner_id)
+                counters['nested_skipped'] += 1
+            keep(order, selector, item, grant)
+
+        grants = []
+        productive = []
+        for order, selector, grant, _ in sorted(kept.values(), key=lambda k: k[0]):
+            grants.append(grant)
+            if selector not in productive:
+                productive.append(selector)
+        productive.sort(key=selectors.index)
+
+        with self._stats_lock:
+            for name, value in counters.items():
+                self._counters[name] += value
+        return grants, productive
+
+    def _extract_structured_grants(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
+        """Grants from schema.org JSON-LD / microdata items; OpenGraph only fills gaps on single-item pages"""
+        items = (structured_data.json_ld_items(soup, self.STRUCTURED_GRANT_TYPES)
+                 or structured_data.microdata_items(soup, self.STRUCTURED_GRANT_TYPES))
+        og = structured_data.opengraph(soup) if len(items) == 1 else {}
+
+        grants = []
+        for item in items:
+            title = structured_data.text_value(item.get('name')) or og.get('title', '')
+            description = structured_data.text_value(item.get('description')) or og.get('description', '')
+            types = structured_data.type_names(item)
+            if not title or ('Event' in types and not CustomCrawlTool.GRANT_INDICATORS.any_in(f"{title} {description}")):
+                continue
+
+            deadline = next((structured_data.text_value(item[prop]) for prop in self.DEADLINE_PROPERTIES
+                             if item.get(prop)), '')
+            if re.match(r'\d{4}-\d{2}-\d{2}T', deadline):
+                deadline = deadline[:10]
+            link = structured_data.text_value(item.get('url')) or og.get('url', '')
+            region = structured_data.text_value(item.get('areaServed') or item.get('eligibleRegion')
+                                                or item.get('location'))
+            text = f"{region} {title} {description}"
+            grant = {
+                'title': title,
+                'amount': structured_data.amount_value(item.get('amount')),
+                'deadline': deadline,
+                'eligibility': structured_data.text_value(item.get('eligibility') or item.get('audience')),
+                'description': (description[:300] + '...') if len(description) > 300 else description,
+                'apply_link': urljoin(url, link) if link else url,
+                'source': urlparse(url).netloc,
+                'country': self._extract_country_from_text(text, url),
+                'sector': self._extract_sector_from_text(text),
+            }
+            funder = structured_data.text_value(item.get('funder') or item.get('sponsor'))
+            if funder:
+                grant['funder'] = funder
+            grants.append(grant)
         return grants
 
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counters = dict(self._counters)
+        matched = counters['elements_matched']
+        skipped = counters['duplicates_skipped'] + counters['nested_skipped'] + counters['containers_skipped']
+        counters['skipped_ratio'] = round(skipped / matched, 3) if matched else 0.0
+        return counters
+
     def _extract_from_single_grant(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
         """Extract grant data from a single grant page"""
-        if not self._is_single_grant_page(soup):
+        # Linearize the document once; every text-based field reads from this copy
+        text = soup.get_text()
+        lower = text.lower()
+        if not self._is_single_grant_text(lower):
             return []
 
+        title, description = self._extract_title_and_description(soup)
         grant = {
-            'title': self._extract_title(soup),
-            'amount': self._extract_amount(soup),
-            'deadline': self._extract_deadline(soup),
-            'eligibility': self._extract_eligibility(soup),
-            'description': self._extract_description(soup),
+            'title': title,
+            'amount': self._extract_amount_from_text(text),
+            'deadline': self._extract_deadline_from_text(text),
+            'eligibility': self._extract_eligibility_from_text(text, lower),
+            'description': description,
             'apply_link': url,
             'source': urlparse(url).netloc,
-            'country': self._extract_country(soup, url),
-            'sector': self._extract_sector(soup)
+            'country': self._extract_country_from_text(text, url),
+            'sector': self._extract_sector_from_text(lower)
         }
         return [grant] if grant['title'] else []
 
@@ -336,55 +1002,90 @@ class CustomExtractTool:
         except Exception:
             return None
 
-    def _is_single_grant_page(self, soup: BeautifulSoup) -> bool:
-        text = soup.get_text().lower()
+    def _is_single_grant_text(self, text: str) -> bool:
+        """`text` is the lowercased page text"""
         indicators = ['deadline', 'eligibility', 'application', 'funding amount', 'apply now', 'who can apply']
         return sum(1 for indicator in indicators if indicator in text) >= 2
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        for selector in ['h1', 'h2', '.title', '.grant-title', '.opportunity-title', '.page-title']:
-            elem = soup.select_one(selector)
-            if elem:
-                return elem.get_text(strip=True)
-        return ''
-
-    def _extract_amount(self, soup: BeautifulSoup) -> str:
-        return self._extract_amount_from_text(soup.get_text())
+    COUNTRY_TERMS = KeywordMatcher({
+        candidate: [candidate] for candidate in
+        ['United States', 'USA', 'Norway', 'European Union', 'EU', 'United Kingdom', 'UK', 'Canada', 'India']
+    })
+    # Sectors in priority order; a text is labelled with the first sector it mentions
+    SECTOR_TERMS = KeywordMatcher({
+        'Technology': ['tech', 'technolog*', 'software', 'ai', 'digital*', 'innovation*', 'data'],
+        'Healthcare': ['health*', 'medical', 'pharma*', 'biotech*', 'clinical'],
+        'Energy': ['energy', 'renewable*', 'clean tech', 'cleantech', 'sustainab*', 'green'],
+        'Research': ['research*', 'science*', 'scientific', 'academic*', 'lab', 'labs', 'laborator*'],
+        'Manufacturing': ['manufactur*', 'industrial', 'hardware'],
+        'Agriculture': ['agricultur*', 'farm*', 'food*', 'agri*'],
+        'Education': ['education*', 'edtech', 'learning'],
+        'Fintech': ['fintech', 'financial', 'banking', 'payment*'],
+    })
+
+    # Selector cascades for single grant pages, in priority order
+    TITLE_SELECTORS = ['h1', 'h2', '.title', '.grant-title', '.opportunity-title', '.page-title']
+    DESCRIPTION_SELECTORS = ['.description', '.summary', '.overview', '.about', '.content', '.article-body']
+
+    def _extract_title_and_description(self, soup: BeautifulSoup):
+        """
+        Resolve the title and description selector cascades in one DOM walk.
+        Picks the same elements as running each select_one in priority order:
+        the first element in document order for the highest-priority selector that matches.
+        """
+        wanted = set(self.TITLE_SELECTORS + self.DESCRIPTION_SELECTORS + ['p'])
+        first = {}
+        for tag in soup.find_all(True):
+            if tag.name in wanted and tag.name not in first:
+                first[tag.name] = tag
+            classes = tag.get('class') or []
+            if isinstance(classes, str):
+                classes = classes.split()
+            for cls in classes:
+                key = '.' + cls
+                if key in wanted and key not in first:
+                    first[key] = tag
+            if self.TITLE_SELECTORS[0] in first and self.DESCRIPTION_SELECTORS[0] in first:
+                break  # top-priority matches found; nothing later can win
+
+        title = ''
+        for selector in self.TITLE_SELECTORS:
+            if selector in first:
+                title = first[selector].get_text(strip=True)
+                break
+
+        description = ''
+        for selector in self.DESCRIPTION_SELECTORS + ['p']:
+            if selector in first:
+                t = first[selector].get_text(strip=True)
+                description = (t[:300] + '...') if len(t) > 300 else t
+                break
+        return title, description
 
     def _extract_amount_from_text(self, text: str) -> str:
-        patterns = [
-            r'\$[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
-            r'€[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
-            r'£[\d,]+(?:\.\d{2})?(?:\s*(?:million|M|thousand|K))?',
-            r'(?:USD|EUR|GBP|NOK)\s*[\d,]+(?:\.\d{2})?',
-            r'[\d,]+\s*(?:USD|EUR|GBP|NOK|dollars?|euros?)',
-        ]
-        for pattern in patterns:
-            m = re.search(pattern, text, re.IGNORECASE)
-            if m:
-                return m.group(0)
-        return ''
-
-    def _extract_deadline(self, soup: BeautifulSoup) -> str:
-        return self._extract_deadline_from_text(soup.get_text())
+        return AMOUNT_PATTERNS.first(text) or ''
 
     def _extract_deadline_from_text(self, text: str) -> str:
-        patterns = [
-            r'\b(?:deadline|due|closes?|expires?)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s*(?:deadline|due)',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
-            r'\d{4}-\d{2}-\d{2}'
-        ]
-        for pattern in patterns:
-            m = re.search(pattern, text, re.IGNORECASE)
-            if m:
-                return m.group(1) if m.groups() else m.group(0)
-        return ''
+        return DEADLINE_PATTERNS.first(text) or ''
+
+    def _extract_eligibility_from_text(self, text: str, lower: Optional[str] = None) -> str:
+        if lower is not None and len(lower) == len(text):
+            # Lowercasing kept offsets aligned: jump straight to the first matching line
+            # instead of splitting and lowercasing every line of a large page
+            idx = lower.find('eligib')
+            if idx < 0:
+                return ''
+            start = text.rfind('\n', 0, idx) + 1
+            end = start
+            for _ in range(3):
+                end = text.find('\n', end)
+                if end < 0:
+                    end = len(text)
+                    break
+                end += 1
+            chunk = ' '.join(text[start:end].split('\n')[:3])
+            return (chunk[:200] + '...') if len(chunk) > 200 else chunk
 
-    def _extract_eligibility(self, soup: BeautifulSoup) -> str:
-        return self._extract_eligibility_from_text(soup.get_text())
-
-    def _extract_eligibility_from_text(self, text: str) -> str:
         lines = text.split('\n')
         for i, line in enumerate(lines):
             if 'eligib' in line.lower():
@@ -392,21 +1093,6 @@ class CustomExtractTool:
                 return (chunk[:200] + '...') if len(chunk) > 200 else chunk
         return ''
 
-    def _extract_description(self, soup: BeautifulSoup) -> str:
-        for selector in ['.description', '.summary', '.overview', '.about', '.content', '.article-body']:
-            elem = soup.select_one(selector)
-            if elem:
-                t = elem.get_text(strip=True)
-                return (t[:300] + '...') if len(t) > 300 else t
-        p = soup.find('p')
-        if p:
-            t = p.get_text(strip=True)
-            return (t[:300] + '...') if len(t) > 300 else t
-        return ''
-
-    def _extract_country(self, soup: BeautifulSoup, url: str) -> str:
-        return self._extract_country_from_text(soup.get_text(), url)
-
     def _extract_country_from_text(self, text: str, url: str) -> str:
         domain = urlparse(url).netloc.lower()
         country_domains = {
@@ -425,34 +1111,14 @@ class CustomExtractTool:
             if hint in domain:
                 return country
 
-        candidates = ['United States', 'USA', 'Norway', 'European Union', 'EU', 'United Kingdom', 'UK', 'Canada', 'India']
-        lower = text.lower()
-        for c in candidates:
-            if c.lower() in lower:
-                return c
-        return 'Global'
-
-    def _extract_sector(self, soup: BeautifulSoup) -> str:
-        return self._extract_sector_from_text(soup.get_text().lower())
+        # Candidates in priority order; the first one with a whole-word hit wins
+        return self.COUNTRY_TERMS.first_category(text, default='Global')
 
     def _extract_sector_from_text(self, text: str) -> str:
-        sectors = {
-            'technology': ['tech', 'software', 'ai', 'digital', 'innovation', 'data'],
-            'healthcare': ['health', 'medical', 'pharma', 'biotech', 'clinical'],
-            'energy': ['energy', 'renewable', 'clean tech', 'sustainability', 'green'],
-            'research': ['research', 'science', 'academic', 'lab'],
-            'manufacturing': ['manufacturing', 'industrial', 'hardware'],
-            'agriculture': ['agriculture', 'farming', 'food', 'agri'],
-            'education': ['education', 'edtech', 'learning'],
-            'fintech': ['fintech', 'financial', 'banking', 'payments'],
-        }
-        for sector, kws in sectors.items():
-            if any(k in text for k in kws):
-                return sector.title()
-        return 'General'
+        return self.SECTOR_TERMS.first_category(text, default='General')
 
 
 # Create instances that can be used by Portia
 custom_browser_tool = CustomBrowserTool()
-custom_crawl_tool = CustomCrawlTool()
-custom_extract_tool = CustomExtractTool()
+custom_crawl_tool = CustomCrawlTool(browser=custom_browser_tool)
+custom_extract_tool = CustomExtractTool(templates=extraction_templates)
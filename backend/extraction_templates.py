@@ -0,0 +1,109 @@
+"""
+Learned per-portal extraction templates.
+Most portals keep a stable listing layout, so the listing selectors that
+produced grants on a domain are stored in SQLite and tried first on that
+domain's next pages; the full selector sweep only runs when the template
+yields nothing. Templates survive restarts; hit / miss counts are kept per domain,
+counted in memory and written to SQLite in batches.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from storage import open_db
+
+
+class ExtractionTemplates:
+    """Per-domain listing selectors that produced valid grants"""
+
+    def __init__(self, db_filename: str = 'extraction_templates.sqlite3', flush_every: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        # Per-domain hit / miss totals reach SQLite every 50 attempts or 60 s, whichever comes first
+        self.flush_every = flush_every if flush_every is not None else int(os.getenv('TEMPLATE_STATS_FLUSH_EVERY', '50'))
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(os.getenv('TEMPLATE_STATS_FLUSH_SEC', '60'))
+        )
+        self._lock = threading.Lock()
+        self._conn = open_db(db_filename)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS templates (
+                domain TEXT PRIMARY KEY,
+                selectors TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                learned_at REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+        # Templates are tiny and read on every page, so they are served from memory
+        self._templates: Dict[str, List[str]] = {
+            row['domain']: json.loads(row['selectors'])
+            for row in self._conn.execute('SELECT domain, selectors FROM templates')
+        }
+        self._counters = {'hits': 0, 'misses': 0, 'sweeps': 0, 'learned': 0}
+        # domain -> [hits, misses] not yet written
+        self._pending: Dict[str, List[int]] = {}
+        self._pending_count = 0
+        self._flushed_at = time.monotonic()
+
+    def get(self, domain: str) -> Optional[List[str]]:
+        with self._lock:
+            selectors = self._templates.get(domain)
+            if selectors is None:
+                self._counters['sweeps'] += 1
+            return list(selectors) if selectors else None
+
+    def record(self, domain: str, hit: bool) -> None:
+        """Count a template attempt; a miss means the full sweep runs next"""
+        with self._lock:
+            if hit:
+                self._counters['hits'] += 1
+            else:
+                self._counters['misses'] += 1
+                self._counters['sweeps'] += 1
+            self._pending.setdefault(domain, [0, 0])[0 if hit else 1] += 1
+            self._pending_count += 1
+            if (self._pending_count >= self.flush_every
+                    or time.monotonic() - self._flushed_at >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write the pending per-domain hit / miss counts"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                'UPDATE templates SET hits = hits + ?, misses = misses + ? WHERE domain = ?',
+                [(hits, misses, domain) for domain, (hits, misses) in self._pending.items()],
+            )
+            self._conn.commit()
+            self._pending.clear()
+        self._pending_count = 0
+        self._flushed_at = time.monotonic()
+
+    def learn(self, domain: str, selectors: List[str]) -> None:
+        """Store the selectors that produced grants on this domain (in sweep order)"""
+        with self._lock:
+            if self._templates.get(domain) == selectors:
+                return
+            self._templates[domain] = list(selectors)
+            self._counters['learned'] += 1
+            self._conn.execute(
+                'INSERT INTO templates (domain, selectors, learned_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(domain) DO UPDATE SET selectors = excluded.selectors, learned_at = excluded.learned_at',
+                (domain, json.dumps(selectors), time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._flush_locked()
+            counters = dict(self._counters)
+            counters['domains'] = len(self._templates)
+        attempts = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / attempts, 3) if attempts else 0.0
+        return counters
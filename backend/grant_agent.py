@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 import os
 import json
+import copy
+import hashlib
 from portia import (
     Portia,
     Config,
@@ -15,15 +17,140 @@ from custom_portia_tools import custom_browser_tool, custom_crawl_tool, custom_e
 print("🛠️ Using custom Portia-compatible web scraping tools")
 CUSTOM_TOOLS_AVAILABLE = True
 # Using web scraping to find real grants from actual websites
-from openai import OpenAI
+from openai import OpenAI, APITimeoutError
+from llm_cache import CachedLLMClient
+from grant_catalog import GrantCatalog
+from grant_portals import PRIMARY_PORTALS, ADDITIONAL_PORTALS
+from keyword_matcher import KeywordMatcher
+from result_cache import QueryResultCache
+from search_sessions import SearchSessionStore
+from time_budget import TimeBudget
+from singleflight import SingleFlight
 import re
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from urllib.parse import urljoin, urlparse
 
 load_dotenv('../.env')
 
+# User fields that change search results beyond the built query text (clarification flags etc.)
+RESULT_CACHE_KEY_FIELDS = (
+    'industry', 'region', 'stage', 'nonDilutiveOnly', 'founderType', 'deadlineWindow', 'mode',
+    'search_mode', 'expand_geographic', 'geographic_focus', 'equity_free', 'sector_expanded',
+    'stage_expanded', 'boost_relevance', 'limit_results', 'deadline_filter', 'fallback_mode',
+    'confirmed', 'needs_reclarification',
+)
+
+# Clarification fields that only narrow an existing result set; any other change needs new retrieval
+NARROWING_CLARIFICATION_FIELDS = (
+    'geographic_focus', 'nonDilutiveOnly', 'equity_free', 'boost_relevance', 'limit_results',
+    'deadline_filter', 'confirmed', 'needs_reclarification',
+)
+
+# Query criteria matchers; terms are whole words, a trailing '*' also matches longer words
+REGION_TERMS = KeywordMatcher({
+    'us': ['united states', 'usa', 'u.s.', 'u.s', 'america*', 'the us', 'us-based', 'us based'],
+    'europe': ['europe*', 'eu'],
+    'india': ['india', 'indian'],
+    'canada': ['canada', 'canadian'],
+    'uk': ['uk', 'united kingdom', 'britain', 'british'],
+})
+# Bare "us" is the pronoun far more often than the country, so only the uppercase token counts
+US_TOKEN_RE = re.compile(r'\bUS\b')
+SECTOR_TERMS = KeywordMatcher({
+    'ai': ['ai', 'artificial intelligence', 'machine learning', 'ml'],
+    'healthcare': ['health*', 'medical', 'biotech*'],
+    'climate': ['climate', 'clean tech', 'cleantech', 'environment*', 'green'],
+    'fintech': ['fintech', 'financial technology', 'payment*'],
+})
+GRANT_TYPE_TERMS = KeywordMatcher({
+    'government': ['government*', 'federal', 'state'],
+    'research': ['research*', 'r&d'],
+    'startup': ['startup*', 'small business*'],
+})
+
+
+def query_regions(text):
+    """Region categories mentioned in the text, in REGION_TERMS order"""
+    regions = REGION_TERMS.categories_in(text)
+    if 'us' not in regions and US_TOKEN_RE.search(text or ''):
+        regions.insert(0, 'us')
+    return regions
+
+
+# Broad regions offered by the search form, as the REGION_TERMS categories and countries they cover
+REGION_GROUPS = {
+    'north america': ('us', 'canada', 'mexico'),
+    'europe': (
+        'europe', 'uk', 'norway', 'switzerland', 'iceland', 'germany', 'france', 'netherlands', 'belgium',
+        'luxembourg', 'ireland', 'spain', 'portugal', 'italy', 'austria', 'denmark', 'sweden', 'finland',
+        'estonia', 'latvia', 'lithuania', 'poland', 'czech republic', 'slovakia', 'hungary', 'slovenia',
+        'croatia', 'romania', 'bulgaria', 'greece', 'cyprus', 'malta',
+    ),
+    'asia pacific': (
+        'india', 'south korea', 'singapore', 'australia', 'new zealand', 'japan', 'china', 'hong kong',
+        'taiwan', 'indonesia', 'malaysia', 'thailand', 'vietnam', 'philippines',
+    ),
+}
+REGION_GROUP_TERMS = KeywordMatcher({
+    'north america': ['north america*'],
+    # 'EU' / 'European Union' stays the 'europe' category: the EU is not all of Europe
+    'europe': ['europe'],
+    'asia pacific': ['asia*', 'apac'],
+})
+# Countries in grant labels that have no REGION_TERMS category of their own
+COUNTRY_TERMS = KeywordMatcher(dict(
+    {
+        country: [country]
+        for countries in REGION_GROUPS.values() for country in countries
+        if country not in REGION_TERMS.category_rank
+    },
+    **{'south korea': ['south korea', 'korea'], 'czech republic': ['czech republic', 'czechia']},
+))
+# 'america*' is a US term, but these Americas are not the United States
+OTHER_AMERICAS_RE = re.compile(r'\b(?:latin|south|central)\s+america\w*', re.IGNORECASE)
+
+
+def region_aliases(text):
+    """
+    REGION_TERMS categories and countries a region or country label stands for; broad regions
+    cover their countries ('USA', 'US' and 'North America' all cover 'us', 'Europe' covers 'norway')
+    """
+    text = OTHER_AMERICAS_RE.sub(' ', text or '')
+    regions = set(query_regions(text)) | set(COUNTRY_TERMS.categories_in(text))
+    for group in REGION_GROUP_TERMS.categories_in(text):
+        regions.update(REGION_GROUPS[group])
+    return regions
+
+
+DEADLINE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%d/%m/%Y', '%B %d, %Y', '%B %d %Y')
+
 class GrantAgent:
     def __init__(self):
         """Initialize the Grant Finding Agent with Portia and LLM capabilities"""
+        # Portal exploration concurrency: global worker cap and per-host cap
+        self.portal_max_workers = max(1, int(os.getenv('PORTAL_MAX_WORKERS', '6')))
+        self.portal_max_per_host = max(1, int(os.getenv('PORTAL_MAX_PER_HOST', '1')))
+        # Grants scored per LLM request; 1 keeps the original one-call-per-grant mode
+        self.score_batch_size = max(1, int(os.getenv('LLM_SCORE_BATCH_SIZE', '10')))
+        # Local grant catalog: answer from the index unless it is stale or sparse for the query
+        self.catalog = GrantCatalog() if os.getenv('GRANT_CATALOG_ENABLED', '1') != '0' else None
+        self.catalog_max_age = float(os.getenv('GRANT_CATALOG_MAX_AGE_SEC', '86400'))
+        self.catalog_min_results = int(os.getenv('GRANT_CATALOG_MIN_RESULTS', '15'))
+        # Whole-response cache for repeated identical searches
+        self.result_cache = QueryResultCache() if os.getenv('RESULT_CACHE_ENABLED', '1') != '0' else None
+        # Default end-to-end latency budget per search in seconds; unlimited unless set (callers may pass their own)
+        self.search_time_budget = float(os.getenv('SEARCH_TIME_BUDGET_SEC', '0'))
+        # Share of the budget retrieval (portals, crawling) may use; the rest is kept for LLM scoring
+        self.retrieval_budget_share = float(os.getenv('SEARCH_RETRIEVAL_BUDGET_SHARE', '0.75'))
+        # Retry-free LLM client for budgeted calls (built on first use, see _llm_for)
+        self._llm_client_no_retries = None
+        # Concurrent identical searches share one execution
+        self.inflight_searches = SingleFlight()
+        # Candidate grants per search, so narrowing clarifications filter instead of re-searching
+        self.sessions = SearchSessionStore() if os.getenv('SEARCH_SESSIONS_ENABLED', '1') != '0' else None
+
         try:
             # Simplified strategy: Use OpenAI for everything (maximum compatibility)
             
@@ -34,7 +161,12 @@ class GrantAgent:
                 
             # Initialize OpenAI LLM client for our processing
             self.llm_client = OpenAI(api_key=openai_api_key)
-            print("✅ OpenAI LLM initialized for processing")
+            if os.getenv('LLM_CACHE_ENABLED', '1') != '0':
+                # Identical completions (same model, messages, sampling) are answered from cache
+                self.llm_client = CachedLLMClient(self.llm_client)
+                print("✅ OpenAI LLM initialized for processing (with response cache)")
+            else:
+                print("✅ OpenAI LLM initialized for processing")
             
             # Initialize Portia with OpenAI and enhanced tools (following documentation best practices)
             try:
@@ -94,47 +226,145 @@ class GrantAgent:
             print(f"⚠️ Grant Agent initialization failed: {str(e)}")
             self.agent_initialized = False
             
-    def find_grants(self, user_input, mode="form"):
+    def find_grants(self, user_input, mode="form", on_event=None, time_budget=None):
         """
         Find grants based on user input using AI agent
         
         Args:
             user_input (dict): User's search criteria or natural language query
             mode (str): "form" or "chat" mode
+            on_event (callable): Optional on_event(event_type, payload) for progressive results;
+                receives 'grants' as each portal finishes (or a single 'catalog' when the catalog
+                answers) and 'ranked' once scoring is done
+            time_budget (float): Latency budget in seconds; defaults to user_input['time_budget_sec']
+                or SEARCH_TIME_BUDGET_SEC, and is unlimited when none is given. When it runs out,
+                partial ranked results are returned and metadata['time_budget']['truncated_stages']
+                lists the stages cut short
             
         Returns:
             dict: Agent response with grants, clarifications, or follow-up questions
         """
+        budget = self._make_time_budget(user_input, time_budget)
+        if not self.agent_initialized or user_input.get('search_mode') == 'live':
+            return self._open_session(self._run_search(user_input, mode, on_event, budget), user_input, mode)
+        
+        try:
+            key = self._result_cache_key(user_input, mode)
+        except Exception as e:
+            print(f"⚠️ Result cache key failed: {e}")
+            return self._open_session(self._run_search(user_input, mode, on_event, budget), user_input, mode)
+        
+        result, state = self.result_cache.get(key) if self.result_cache else (None, None)
+        if state == 'stale':
+            # Serve instantly, refresh behind the response
+            self.result_cache.refresh_in_background(key, lambda: self._cacheable(self._run_search(user_input, mode)))
+        if result is None:
+            # Identical searches already running are joined rather than repeated
+            # (joiners get the final result only, not the leader's progress events)
+            result, shared = self.inflight_searches.do(key, lambda: self._run_search(user_input, mode, on_event, budget))
+            state = 'coalesced' if shared else 'miss'
+            if not shared and self.result_cache and self._cacheable(result):
+                self.result_cache.set(key, result)
+            # Every caller of a shared execution gets its own copy to annotate
+            result = copy.deepcopy(result)
+        
+        if self.result_cache:
+            result.setdefault('metadata', {})['result_cache'] = {
+                'status': 'hit' if state == 'fresh' else state,
+                'hit_ratio': self.result_cache.hit_ratio()
+            }
+        return self._open_session(result, user_input, mode)
+    
+    def _make_time_budget(self, user_input, time_budget=None):
+        """Budget for one search: explicit argument, then the request's time_budget_sec, then the default"""
+        seconds = time_budget if time_budget is not None else user_input.get('time_budget_sec')
+        try:
+            return TimeBudget(float(seconds) if seconds is not None else self.search_time_budget)
+        except (TypeError, ValueError):
+            print(f"⚠️ Ignoring invalid time budget {seconds!r}")
+            return TimeBudget(self.search_time_budget)
+    
+    def _open_session(self, result, user_input, mode):
+        """Keep the candidate grants of a successful search and return the session id in metadata"""
+        if self.sessions and result and result.get('status') == 'success':
+            metadata = result.setdefault('metadata', {})
+            metadata['session_id'] = self.sessions.create(
+                user_input, mode, metadata.get('query_used', ''), result.get('grants', [])
+            )
+        return result
+    
+    def _result_cache_key(self, user_input, mode):
+        """Stable key from the normalized query plus the user fields that affect results"""
+        if mode == "chat":
+            # Keyed on the raw text so a cache hit skips the LLM criteria extraction too
+            query = user_input.get('query', '')
+        else:
+            query = self._build_query(user_input, mode)
+        fields = {
+            field: user_input[field] for field in RESULT_CACHE_KEY_FIELDS
+            if user_input.get(field) not in (None, '', False)
+        }
+        blob = json.dumps([mode, ' '.join(str(query).lower().split()), fields], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+    
+    def _cacheable(self, result):
+        """Only complete, successful searches are worth caching (budget-truncated ones are not)"""
+        if not result or result.get('status') != 'success':
+            return None
+        if result.get('metadata', {}).get('time_budget', {}).get('truncated_stages'):
+            return None
+        return result
+    
+    def _run_search(self, user_input, mode="form", on_event=None, budget=None):
+        """Run the full search pipeline (catalog or live crawl, LLM processing, clarification check)"""
+        budget = budget or TimeBudget(self.search_time_budget)
         try:
             if not self.agent_initialized:
                 return self._fallback_error_response(user_input, error="Agent initialization failed")
                 
             # Parse user input and create structured query
             query = self._build_query(user_input, mode)
-            
-            # Step 1: Search for grants (try Portia enhanced, fallback to LLM)
-            if self.portia_available:
+            on_portal = self._portal_event_emitter(on_event)
+            retrieval_budget = budget.slice(self.retrieval_budget_share)
+            
+            # Step 1: Answer from the local catalog when it is fresh and has enough matches
+            grant_search_results = None
+            if user_input.get('search_mode') != 'live':
+                grant_search_results = self._search_catalog(query)
+            results_source = 'catalog' if grant_search_results is not None else 'live'
+            if grant_search_results is not None and on_event:
+                # One 'catalog' event instead of per-portal 'grants' events
                 try:
-                    grant_search_results = self._search_with_portia(query)
-                    # If Portia returns insufficient results, search more websites
-                    if not grant_search_results or len(grant_search_results) < 15:
-                        print(f"🔄 Portia returned {len(grant_search_results) if grant_search_results else 0} results, expanding search to more grant websites")
-                        additional_results = self._expand_web_search(query)
-                        # Combine results
-                        if grant_search_results:
-                            grant_search_results.extend(additional_results)
-                        else:
-                            grant_search_results = additional_results
-                        print(f"📊 Expanded search found {len(grant_search_results)} total grants from web sources")
-                except Exception as portia_error:
-                    print(f"⚠️ Portia search failed: {portia_error}")
-                    print("🔄 Using expanded web search fallback")
-                    grant_search_results = self._expand_web_search(query)
-            else:
-                grant_search_results = self._expand_web_search(query)
+                    on_event('catalog', {'grants': self._validate_grant_data(grant_search_results)})
+                except Exception as e:
+                    print(f"⚠️ Progress event failed for catalog: {e}")
+            
+            # Otherwise search live (try Portia enhanced, fallback to LLM)
+            if grant_search_results is None:
+                if self.portia_available:
+                    try:
+                        grant_search_results = self._search_with_portia(query, on_portal, retrieval_budget)
+                        # If Portia returns insufficient results, search more websites
+                        if not grant_search_results or len(grant_search_results) < 15:
+                            print(f"🔄 Portia returned {len(grant_search_results) if grant_search_results else 0} results, expanding search to more grant websites")
+                            additional_results = self._expand_web_search(query, on_portal, retrieval_budget)
+                            # Combine results
+                            if grant_search_results:
+                                grant_search_results.extend(additional_results)
+                            else:
+                                grant_search_results = additional_results
+                            print(f"📊 Expanded search found {len(grant_search_results)} total grants from web sources")
+                    except Exception as portia_error:
+                        print(f"⚠️ Portia search failed: {portia_error}")
+                        print("🔄 Using expanded web search fallback")
+                        grant_search_results = self._expand_web_search(query, on_portal, retrieval_budget)
+                else:
+                    grant_search_results = self._expand_web_search(query, on_portal, retrieval_budget)
             
             # Step 2: Use LLM to analyze and structure results
-            processed_grants = self._process_with_llm(grant_search_results, user_input)
+            processed_grants = self._process_with_llm(grant_search_results, user_input, budget)
+            if on_event:
+                on_event('ranked', {'grants': processed_grants, 'total_found': len(processed_grants)})
             
             # Step 3: Check if clarification is needed
             clarification = self._check_need_clarification(processed_grants, user_input)
@@ -153,7 +383,9 @@ class GrantAgent:
                 'metadata': {
                     'query_used': query,
                     'total_found': len(processed_grants),
-                    'mode': mode
+                    'mode': mode,
+                    'results_source': results_source,
+                    'time_budget': budget.summary()
                 }
             }
             
@@ -161,6 +393,18 @@ class GrantAgent:
             print(f"❌ Grant search failed: {str(e)}")
             return self._fallback_error_response(user_input, error=str(e))
     
+    def _portal_event_emitter(self, on_event):
+        """Wrap on_event as a per-portal callback that streams that portal's (unscored) grants"""
+        if not on_event:
+            return None
+        
+        def on_portal(portal, grants):
+            try:
+                on_event('grants', {'portal': portal['name'], 'grants': self._validate_grant_data(grants)})
+            except Exception as e:
+                print(f"⚠️ Progress event failed for {portal['name']}: {e}")
+        return on_portal
+    
     def _build_query(self, user_input, mode):
         """Build a structured query for grant search using founder profile"""
         if mode == "chat":
@@ -231,7 +475,7 @@ class GrantAgent:
             print(f"⚠️ LLM extraction failed: {e}")
             return query
     
-    def _search_with_portia(self, query):
+    def _search_with_portia(self, query, on_portal=None, budget=None):
         """Use Portia agent with Browser, Crawl, and Extract tools for precise grant data"""
         try:
             print(f"🔍 Enhanced Portia search starting: {query}")
@@ -241,15 +485,9 @@ class GrantAgent:
             
             all_grants = []
             
-            # Step 2: For each portal, use Browser/Crawl/Extract tools
-            for portal in grant_portals:
-                try:
-                    portal_grants = self._explore_grant_portal(portal, query)
-                    all_grants.extend(portal_grants)
-                    print(f"📋 Found {len(portal_grants)} grants from {portal['name']}")
-                except Exception as portal_error:
-                    print(f"⚠️ Portal {portal['name']} failed: {portal_error}")
-                    continue
+            # Step 2: Explore all portals in parallel with Browser/Crawl/Extract tools
+            for portal_grants in self._explore_portals_concurrently(grant_portals, query, on_portal, budget):
+                all_grants.extend(portal_grants)
             
             # Step 3: Deduplicate and limit results
             unique_grants = self._deduplicate_grants(all_grants)
@@ -264,126 +502,40 @@ class GrantAgent:
             # Fallback to basic search
             return self._fallback_grant_search(query)
     
+    def _search_catalog(self, query):
+        """Search the local catalog; None when it is stale or sparse for this query (crawl live instead)"""
+        if not self.catalog:
+            return None
+        try:
+            # Stale if any portal this query would crawl hasn't been checked recently
+            # (an unreachable portal counts as checked; crawling it live wouldn't help)
+            portals = self._identify_grant_portals(query)
+            ages = self.catalog.portal_ages(portal['name'] for portal in portals)
+            stale = [name for name, age in ages.items() if age is None or age > self.catalog_max_age]
+            if stale:
+                print(f"📚 Catalog stale for {', '.join(stale)}; crawling live")
+                return None
+            
+            keywords = self._extract_keywords_from_query(query)
+            grants = self._deduplicate_grants(self.catalog.search(keywords, limit=35))
+            if len(grants) < self.catalog_min_results:
+                print(f"📚 Catalog has only {len(grants)} matches; crawling live")
+                return None
+            
+            print(f"📚 Answered from catalog: {len(grants)} grants")
+            return grants
+            
+        except Exception as e:
+            print(f"⚠️ Catalog search failed: {e}")
+            return None
+    
     def _identify_grant_portals(self, query):
         """Identify relevant grant portals based on query criteria"""
         # Extract criteria from query
         criteria = self._extract_search_criteria(query)
         
         # Base portal list with intelligent targeting
-        all_portals = [
-            {
-                'name': 'grants.gov',
-                'url': 'https://www.grants.gov',
-                'regions': ['US', 'North America'],
-                'types': ['government', 'federal', 'research'],
-                'search_patterns': ['/search/', '/find/']
-            },
-            {
-                'name': 'SBIR',
-                'url': 'https://www.sbir.gov',
-                'regions': ['US'],
-                'types': ['small business', 'innovation', 'research'],
-                'search_patterns': ['/funding/', '/opportunities/']
-            },
-            {
-                'name': 'Innovation Norway',
-                'url': 'https://www.innovasjonnorge.no',
-                'regions': ['Norway', 'Europe'],
-                'types': ['innovation', 'startup'],
-                'search_patterns': ['/funding/', '/grants/']
-            },
-            {
-                'name': 'Startup India',
-                'url': 'https://www.startupindia.gov.in',
-                'regions': ['India', 'Asia Pacific'],
-                'types': ['startup', 'innovation'],
-                'search_patterns': ['/funding/', '/schemes/']
-            },
-            {
-                'name': 'Horizon Europe',
-                'url': 'https://ec.europa.eu/info/funding-tenders',
-                'regions': ['Europe', 'EU'],
-                'types': ['research', 'innovation', 'sme'],
-                'search_patterns': ['/opportunities/', '/calls/']
-            },
-            {
-        'name': 'The Grant Portal (International)',
-        'url': 'https://international.thegrantportal.com/',
-        'regions': ['Worldwide'],
-        'types': ['nonprofit', 'small business', 'individual'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'Global Innovation Fund',
-        'url': 'https://www.globalinnovation.fund/apply-for-funding',
-        'regions': ['Global', 'Developing Countries'],
-        'types': ['social impact', 'innovation'],
-        'search_patterns': ['/apply-for-funding']
-    },
-    {
-        'name': 'CRDF Global – Funding Opportunities',
-        'url': 'https://www.crdfglobal.org/funding-opportunities/',
-        'regions': ['Global'],
-        'types': ['research', 'innovation', 'fellowship'],
-        'search_patterns': ['/funding-opportunities']
-    },
-    {
-        'name': 'OpenGrants',
-        'url': 'https://opengrants.io/',
-        'regions': ['Global'],
-        'types': ['grant discovery', 'intelligent search'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'Funds for NGOs',
-        'url': 'https://www.fundsforngos.org/',
-        'regions': ['Global', 'Emerging Markets'],
-        'types': ['ngo', 'sustainability', 'development'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'GrantWatch',
-        'url': 'https://www.grantwatch.com/',
-        'regions': ['Global', 'US'],
-        'types': ['nonprofit', 'business', 'individual'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'Start-Up Chile',
-        'url': 'https://startupchile.org/en/apply/',
-        'regions': ['Global', 'Latin America', 'Chile'],
-        'types': ['accelerator', 'equity-free'],
-        'search_patterns': ['/apply/']
-    },
-    {
-        'name': 'K-Startup Grand Challenge',
-        'url': 'https://www.k-startupgc.org/',
-        'regions': ['Global', 'Asia', 'South Korea'],
-        'types': ['accelerator', 'grant'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'EU Funding & Tenders Portal',
-        'url': 'https://ec.europa.eu/info/funding-tenders/opportunities/portal/',
-        'regions': ['Europe', 'EU', 'Global'],
-        'types': ['research', 'innovation', 'SME'],
-        'search_patterns': ['/opportunities/portal']
-    },
-    {
-        'name': 'Cascade Funding Hub',
-        'url': 'https://cascadefunding.eu/',
-        'regions': ['Europe'],
-        'types': ['innovation', 'SME', 'startup'],
-        'search_patterns': ['/']
-    },
-    {
-        'name': 'UnLtd (UK Social Entrepreneurs)',
-        'url': 'https://www.unltd.org.uk/',
-        'regions': ['UK'],
-        'types': ['social entrepreneurship', 'grants', 'investment'],
-        'search_patterns': ['/']
-    },
-        ]
+        all_portals = PRIMARY_PORTALS
         
         # Filter portals based on criteria
         relevant_portals = []
@@ -406,40 +558,9 @@ class GrantAgent:
             'stage': None
         }
         
-        query_lower = query.lower()
-        
-        # Extract regions
-        region_patterns = {
-            'us': ['united states', 'usa', 'america', 'us'],
-            'europe': ['europe', 'eu', 'european'],
-            'india': ['india', 'indian'],
-            'canada': ['canada', 'canadian'],
-            'uk': ['uk', 'united kingdom', 'britain']
-        }
-        
-        for region, patterns in region_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
-                criteria['regions'].append(region)
-        
-        # Extract sectors
-        sector_patterns = {
-            'ai': ['ai', 'artificial intelligence', 'machine learning', 'ml'],
-            'healthcare': ['healthcare', 'health', 'medical', 'biotech'],
-            'climate': ['climate', 'clean tech', 'environment', 'green'],
-            'fintech': ['fintech', 'financial technology', 'payments']
-        }
-        
-        for sector, patterns in sector_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
-                criteria['sectors'].append(sector)
-        
-        # Extract grant types
-        if any(word in query_lower for word in ['government', 'federal', 'state']):
-            criteria['types'].append('government')
-        if any(word in query_lower for word in ['research', 'r&d']):
-            criteria['types'].append('research')
-        if any(word in query_lower for word in ['startup', 'small business']):
-            criteria['types'].append('startup')
+        criteria['regions'] = query_regions(query)
+        criteria['sectors'] = SECTOR_TERMS.categories_in(query)
+        criteria['types'] = GRANT_TYPE_TERMS.categories_in(query)
         
         return criteria
     
@@ -466,26 +587,102 @@ class GrantAgent:
         # Default match for broad searches
         return True
     
-    def _explore_grant_portal(self, portal, query):
-        """Use custom web scraping tools to explore a grant portal"""
+    def _explore_portals_concurrently(self, portals, query, on_portal=None, budget=None):
+        """
+        Explore portals in parallel and return each portal's grants in portal order.
+        on_portal(portal, grants) is called as each portal completes, fastest first.
+        Portals still running when the budget runs out are abandoned (left empty).
+        """
+        if not portals:
+            return []
+        if budget and budget.expired():
+            budget.truncate('portal_exploration')
+            return [[] for _ in portals]
+
+        # One semaphore per host so portals sharing a domain don't hammer it together
+        host_slots = {}
+        for portal in portals:
+            host = urlparse(portal['url']).netloc.lower()
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(self.portal_max_per_host)
+
+        def explore(portal):
+            with host_slots[urlparse(portal['url']).netloc.lower()]:
+                if budget and budget.expired():
+                    budget.truncate('portal_exploration')
+                    return []
+                return self._explore_grant_portal(portal, query, budget)
+
+        # Results are slotted by portal index so merging stays deterministic
+        results = [[] for _ in portals]
+        max_workers = min(self.portal_max_workers, len(portals))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='portal')
+        timed_out = False
+        try:
+            futures = {executor.submit(explore, portal): i for i, portal in enumerate(portals)}
+            remaining = budget.remaining() if budget and budget.limited else None
+            for future in as_completed(futures, timeout=remaining):
+                index = futures[future]
+                portal = portals[index]
+                try:
+                    results[index] = future.result()
+                    print(f"📋 Found {len(results[index])} grants from {portal['name']}")
+                except Exception as portal_error:
+                    print(f"⚠️ Portal {portal['name']} failed: {portal_error}")
+                    continue
+                if on_portal and results[index]:
+                    on_portal(portal, results[index])
+        except FuturesTimeoutError:
+            timed_out = True
+            pending = [portals[i]['name'] for future, i in futures.items() if not future.done()]
+            print(f"⏱️ Time budget exhausted, abandoning portals: {', '.join(pending)}")
+            budget.truncate('portal_exploration')
+        finally:
+            # Abandoned portals finish in the background (their own fetches are clamped by the budget)
+            executor.shutdown(wait=not timed_out, cancel_futures=timed_out)
+
+        return results
+    
+    def _explore_grant_portal(self, portal, query, budget=None, browser=None, crawler=None):
+        """
+        Use custom web scraping tools to explore a grant portal.
+        browser / crawler replace the shared tools (the harvester passes ones that revalidate the page cache).
+        """
+        browser = browser or custom_browser_tool
+        crawler = crawler or custom_crawl_tool
         try:
             print(f"🌐 Exploring {portal['name']} at {portal['url']}")
             
             # Step 1: Navigate to the portal homepage
-            page_data = custom_browser_tool.navigate_to_url(portal['url'])
+            page_data = browser.navigate_to_url(portal['url'], budget=budget)
             
             if not page_data.get('success'):
                 print(f"   ❌ Failed to access {portal['name']}")
+                # Remember the failed check so the portal isn't treated as never harvested
+                # (a fetch the time budget cut short says nothing about the portal)
+                if self.catalog and not (budget and budget.expired()):
+                    try:
+                        self.catalog.record_failure(portal, str(page_data.get('error') or ''))
+                    except Exception as catalog_error:
+                        print(f"⚠️ Catalog update failed for {portal['name']}: {catalog_error}")
+                if page_data.get('circuit_open') and self.catalog:
+                    # Portal is being skipped by the circuit breaker; fall back to its last harvest
+                    cached_grants = self.catalog.portal_grants(portal['name'])
+                    if cached_grants:
+                        print(f"   📚 Using {len(cached_grants)} catalog grants for {portal['name']}")
+                        return cached_grants
                 return []
             
             print(f"   📄 Successfully accessed: {page_data.get('title', 'No title')}")
             
             # Step 2: Crawl for grant-related pages
             keywords = self._extract_keywords_from_query(query)
-            grant_pages = custom_crawl_tool.crawl_for_grants(
+            grant_pages = crawler.crawl_for_grants(
                 portal['url'], 
                 keywords, 
-                max_pages=3  # Limit for hackathon demo
+                max_pages=3,  # Limit for hackathon demo
+                budget=budget,
+                seed_page=page_data  # homepage fetched above; don't fetch it twice
             )
             
             if not grant_pages:
@@ -499,6 +696,14 @@ class GrantAgent:
                 grants = custom_extract_tool.extract_grant_data(page)
                 all_grants.extend(grants)
             
+            # Keep the catalog current with whatever was really extracted (never the fallbacks below,
+            # nor a crawl the time budget cut short, which would replace the portal's full set)
+            if self.catalog and not (budget and budget.expired()):
+                try:
+                    self.catalog.record_portal(portal, all_grants)
+                except Exception as catalog_error:
+                    print(f"⚠️ Catalog update failed for {portal['name']}: {catalog_error}")
+            
             # If no structured grants found, create fallback grants based on portal
             if not all_grants:
                 all_grants = self._create_fallback_grants(portal, query)
@@ -735,7 +940,7 @@ class GrantAgent:
             print(f"⚠️ Portia results parsing failed: {e}")
             return []
     
-    def _process_with_llm(self, grants, user_input):
+    def _process_with_llm(self, grants, user_input, budget=None):
         """Enhanced LLM processing with data validation and relevance scoring"""
         if not grants:
             return []
@@ -747,7 +952,7 @@ class GrantAgent:
             validated_grants = self._validate_grant_data(grants)
             
             # Step 2: Score relevance to user criteria
-            scored_grants = self._score_grant_relevance(validated_grants, user_input)
+            scored_grants = self._score_grant_relevance(validated_grants, user_input, budget)
             
             # Step 3: Enhance with additional context
             enhanced_grants = self._enhance_grant_context(scored_grants, user_input)
@@ -790,73 +995,198 @@ class GrantAgent:
         
         return validated_grants
     
-    def _score_grant_relevance(self, grants, user_input):
-        """Score grants based on relevance to user criteria"""
+    def _score_grant_relevance(self, grants, user_input, budget=None):
+        """Score grants based on relevance to user criteria (grants left when the budget runs out get 50)"""
         try:
             # Create criteria summary
             criteria_text = self._summarize_user_criteria(user_input)
             
-            for grant in grants:
-                # Use LLM to score relevance
-                response = self.llm_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """Score grant relevance to user criteria on a scale of 0-100.
-                            
-                            Consider these factors:
-                            - Geographic match (country/region)
-                            - Sector/industry alignment
-                            - Startup stage suitability
-                            - Funding amount appropriateness
-                            - Eligibility requirements match
-                            - Deadline urgency (higher score for sooner deadlines)
-                            
-                            Return only a number between 0-100."""
-                        },
-                        {
-                            "role": "user",
-                            "content": f"""User criteria: {criteria_text}
-                            
-                            Grant: {grant['title']}
-                            Country: {grant['country']}
-                            Sector: {grant['sector']}
-                            Amount: {grant['amount']}
-                            Deadline: {grant['deadline']}
-                            Eligibility: {grant['eligibility'][:200]}
-                            
-                            Score this grant's relevance (0-100):"""
-                        }
-                    ],
-                    temperature=0.2,
-                    max_tokens=10
-                )
-                
-                try:
-                    score_text = response.choices[0].message.content
-                    if score_text:
-                        score_text = score_text.strip()
-                        match = re.search(r'\d+', score_text)
-                        if match:
-                            score = int(match.group())
-                            grant['relevance_score'] = min(max(score, 0), 100)
-                        else:
-                            grant['relevance_score'] = 50
-                    else:
-                        grant['relevance_score'] = 50
-                except:
-                    grant['relevance_score'] = 50  # Default score
+            if self.score_batch_size > 1:
+                # Batched mode: one structured request per batch, per-grant calls only for items it missed
+                for start in range(0, len(grants), self.score_batch_size):
+                    batch = grants[start:start + self.score_batch_size]
+                    if budget and budget.expired():
+                        break
+                    scores = self._score_grant_batch(batch, criteria_text, budget)
+                    for grant, score in zip(batch, scores):
+                        if score is None and not (budget and budget.expired()):
+                            score = self._score_single_grant(grant, criteria_text, budget)
+                        if score is not None:
+                            grant['relevance_score'] = score
+            else:
+                for grant in grants:
+                    if budget and budget.expired():
+                        break
+                    score = self._score_single_grant(grant, criteria_text, budget)
+                    if score is not None:
+                        grant['relevance_score'] = score
+            
+            unscored = [grant for grant in grants if 'relevance_score' not in grant]
+            if unscored:
+                print(f"⚠️ {len(unscored)} grants left unscored (failed requests or time budget)")
+                if budget and budget.expired():
+                    budget.truncate('relevance_scoring')
+                for grant in unscored:
+                    grant['relevance_score'] = 50
             
             return grants
             
         except Exception as e:
             print(f"⚠️ Relevance scoring failed: {e}")
-            # Assign default scores
+            # Default scores only for grants that didn't get one
             for i, grant in enumerate(grants):
-                grant['relevance_score'] = 80 - (i * 2)  # Decreasing scores
+                grant.setdefault('relevance_score', 80 - (i * 2))  # Decreasing scores
             return grants
     
+    def _score_single_grant(self, grant, criteria_text, budget=None):
+        """Score one grant with its own LLM round trip (0-100, 50 if the reply is unusable, None if the request failed)"""
+        try:
+            response = self._llm_for(budget).chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": """Score grant relevance to user criteria on a scale of 0-100.
+                    
+                    Consider these factors:
+                    - Geographic match (country/region)
+                    - Sector/industry alignment
+                    - Startup stage suitability
+                    - Funding amount appropriateness
+                    - Eligibility requirements match
+                    - Deadline urgency (higher score for sooner deadlines)
+                    
+                    Return only a number between 0-100."""
+                    },
+                    {
+                        "role": "user",
+                        "content": f"""User criteria: {criteria_text}
+                    
+                    Grant: {grant['title']}
+                    Country: {grant['country']}
+                    Sector: {grant['sector']}
+                    Amount: {grant['amount']}
+                    Deadline: {grant['deadline']}
+                    Eligibility: {grant['eligibility'][:200]}
+                    
+                    Score this grant's relevance (0-100):"""
+                    }
+                ],
+                temperature=0.2,
+                max_tokens=10,
+                **self._llm_timeout(budget)
+            )
+        except Exception as e:
+            print(f"⚠️ Scoring failed for {grant.get('title', 'grant')}: {e}")
+            if isinstance(e, APITimeoutError) and budget:
+                # The timeout was clamped to the budget: nothing is left for the remaining grants
+                budget.exhaust()
+            return None
+        
+        try:
+            score_text = response.choices[0].message.content
+            if score_text:
+                score_text = score_text.strip()
+                match = re.search(r'\d+', score_text)
+                if match:
+                    score = int(match.group())
+                    return min(max(score, 0), 100)
+            return 50
+        except:
+            return 50  # Default score
+    
+    def _score_grant_batch(self, grants, criteria_text, budget=None):
+        """
+        Score a batch of grants in one request that answers with a JSON array.
+        Returns one score per grant, with None for any item the reply didn't cover.
+        """
+        grant_lines = []
+        for i, grant in enumerate(grants, 1):
+            grant_lines.append(
+                f"""Grant #{i}: {grant['title']}
+                    Country: {grant['country']}
+                    Sector: {grant['sector']}
+                    Amount: {grant['amount']}
+                    Deadline: {grant['deadline']}
+                    Eligibility: {grant['eligibility'][:200]}"""
+            )
+        
+        try:
+            response = self._llm_for(budget).chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": """Score each grant's relevance to user criteria on a scale of 0-100.
+                        
+                        Consider these factors:
+                        - Geographic match (country/region)
+                        - Sector/industry alignment
+                        - Startup stage suitability
+                        - Funding amount appropriateness
+                        - Eligibility requirements match
+                        - Deadline urgency (higher score for sooner deadlines)
+                        
+                        Score every grant independently, exactly as if it were the only one shown.
+                        Return only a JSON array with one object per grant:
+                        [{"id": <grant number>, "score": <0-100>}, ...]"""
+                    },
+                    {
+                        "role": "user",
+                        "content": f"""User criteria: {criteria_text}
+                        
+                        {chr(10).join(grant_lines)}
+                        
+                        Score each grant's relevance (0-100) as a JSON array:"""
+                    }
+                ],
+                temperature=0.2,
+                max_tokens=20 * len(grants) + 20,
+                **self._llm_timeout(budget)
+            )
+            
+            content = response.choices[0].message.content or ""
+            json_match = re.search(r'\[.*\]', content, re.DOTALL)
+            items = json.loads(json_match.group()) if json_match else []
+        except Exception as e:
+            print(f"⚠️ Batch scoring failed, falling back to per-grant scoring: {e}")
+            if isinstance(e, APITimeoutError) and budget:
+                # The timeout was clamped to the budget: skip the per-grant fallback too
+                budget.exhaust()
+            return [None] * len(grants)
+        
+        scores = [None] * len(grants)
+        for item in items if isinstance(items, list) else []:
+            try:
+                index = int(item['id']) - 1
+                score = int(float(item['score']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < len(grants):
+                scores[index] = min(max(score, 0), 100)
+        
+        missing = sum(1 for score in scores if score is None)
+        if missing:
+            print(f"⚠️ Batch scoring missed {missing}/{len(grants)} grants, scoring them individually")
+        return scores
+    
+    def _llm_timeout(self, budget):
+        """Request timeout kwargs clamped to the search budget (none when unlimited)"""
+        if budget and budget.limited:
+            return {'timeout': budget.timeout(60, minimum=1.0)}
+        return {}
+    
+    def _llm_for(self, budget):
+        """
+        The LLM client for a call under this budget. Limited budgets get a client that
+        doesn't retry, since the SDK's retries would multiply the clamped timeout.
+        """
+        if not (budget and budget.limited):
+            return self.llm_client
+        if self._llm_client_no_retries is None:
+            self._llm_client_no_retries = self.llm_client.with_options(max_retries=0)
+        return self._llm_client_no_retries
+    
     def _enhance_grant_context(self, grants, user_input):
         """Add helpful context and explanations to grants"""
         try:
@@ -1040,62 +1370,19 @@ class GrantAgent:
         
         return None
     
-    def _expand_web_search(self, query):
+    def _expand_web_search(self, query, on_portal=None, budget=None):
         """Expand web search to more grant websites for comprehensive results"""
         try:
             print(f"🌐 Expanding web search for more grants: {query}")
             
             # Additional grant websites to search
-            additional_portals = [
-                {
-                    'name': 'GrantSpace',
-                    'url': 'https://grantspace.org',
-                    'regions': ['Global'],
-                    'types': ['foundation', 'nonprofit'],
-                    'search_patterns': ['/']
-                },
-                {
-                    'name': 'Foundation Directory Online',
-                    'url': 'https://fconline.foundationcenter.org',
-                    'regions': ['US', 'Global'],
-                    'types': ['foundation'],
-                    'search_patterns': ['/']
-                },
-                {
-                    'name': 'GrantWatch',
-                    'url': 'https://www.grantwatch.com',
-                    'regions': ['Global'],
-                    'types': ['government', 'foundation', 'corporate'],
-                    'search_patterns': ['/']
-                },
-                {
-                    'name': 'Devex Funding',
-                    'url': 'https://www.devex.com/funding',
-                    'regions': ['Global'],
-                    'types': ['development', 'international'],
-                    'search_patterns': ['/funding']
-                },
-                {
-                    'name': 'OpenGrants',
-                    'url': 'https://opengrants.io',
-                    'regions': ['Global'],
-                    'types': ['research', 'innovation'],
-                    'search_patterns': ['/']
-                }
-            ]
+            additional_portals = ADDITIONAL_PORTALS
             
             all_grants = []
             
-            # Search additional portals
-            for portal in additional_portals[:3]:  # Limit to 3 additional sites
-                try:
-                    print(f"🔍 Searching {portal['name']}...")
-                    portal_grants = self._explore_grant_portal(portal, query)
-                    all_grants.extend(portal_grants)
-                    print(f"📋 Found {len(portal_grants)} grants from {portal['name']}")
-                except Exception as e:
-                    print(f"⚠️ Failed to search {portal['name']}: {e}")
-                    continue
+            # Search additional portals in parallel
+            for portal_grants in self._explore_portals_concurrently(additional_portals[:3], query, on_portal, budget):  # Limit to 3 additional sites
+                all_grants.extend(portal_grants)
             
             # If still not enough grants, create a few verified fallback grants
             if len(all_grants) < 10:
@@ -1235,7 +1522,8 @@ class GrantAgent:
                 'needed': True,
                 'question': "I'm having trouble finding grants that match your exact criteria. One quick question to help me refine results...",
                 'options': [
-                    'Focus on global grants or just your region?',
+                    'Expand to global grants',
+                    'Focus on just your region',
                     'Broaden to include related industries?',
                     'Include earlier/later stage opportunities?',
                     'I\'m having trouble understanding your preference - would you like me to proceed with general grant results instead?'
@@ -1247,7 +1535,8 @@ class GrantAgent:
                 'needed': True,
                 'question': f"Great! I found {len(grants)} potential grants. Just to narrow this down...",
                 'options': [
-                    'Focus on global grants or just your region?',
+                    'Expand to global grants',
+                    'Focus on just your region',
                     'Prefer non-dilutive grants only?',
                     'Show only the most relevant ones',
                     'Filter by deadline proximity (closing soon)'
@@ -1322,21 +1611,21 @@ class GrantAgent:
             choice_lower = clarification_choice.lower()
             
             # Handle empathetic clarification choices
-            if 'global grants' in choice_lower:
+            if re.search(r'just your region|focus.*region', choice_lower):
+                # Keep regional focus (checked first: older option text offered both in one choice)
+                modified_query['geographic_focus'] = 'regional'
+                
+            elif 'global grants' in choice_lower:
                 # Expand to global search
                 modified_query['region'] = 'Global'
                 modified_query['expand_geographic'] = True
                 
-            elif 'just your region' in choice_lower or 'focus.*region' in choice_lower:
-                # Keep regional focus
-                modified_query['geographic_focus'] = 'regional'
-                
-            elif 'non-dilutive grants only' in choice_lower or 'non-dilutive.*only' in choice_lower:
+            elif re.search(r'non-dilutive.*only', choice_lower):
                 # Filter for non-dilutive only
                 modified_query['nonDilutiveOnly'] = True
                 modified_query['equity_free'] = True
                 
-            elif 'broaden.*related industries' in choice_lower or 'related industries' in choice_lower:
+            elif 'related industries' in choice_lower:
                 # Expand sector search using industry mapping
                 if modified_query.get('industry'):
                     industry_map = {
@@ -1375,7 +1664,7 @@ class GrantAgent:
                 for key in ['nonDilutiveOnly', 'founderType']:
                     modified_query.pop(key, None)
                     
-            elif 'that\'s correct' in choice_lower or 'yes.*correct' in choice_lower:
+            elif 'that\'s correct' in choice_lower or re.search(r'yes.*correct', choice_lower):
                 # User confirmed understanding - proceed with original query
                 modified_query['confirmed'] = True
                 
@@ -1389,6 +1678,115 @@ class GrantAgent:
             print(f"⚠️ Clarification application failed: {e}")
             return original_query
     
+    def refine_search(self, session_id, original_query, clarification_choice, mode="form"):
+        """
+        Apply a clarification choice to an earlier search.
+        Narrowing choices filter the session's candidate grants locally;
+        widening choices (or sessions disabled) run a new search.
+        
+        Returns:
+            dict: Same shape as find_grants
+        """
+        modified_query = self.apply_clarification(original_query, clarification_choice)
+        changed = {
+            key for key in set(original_query) | set(modified_query)
+            if original_query.get(key) != modified_query.get(key)
+        }
+        if not self.sessions or any(key not in NARROWING_CLARIFICATION_FIELDS for key in changed):
+            return self.find_grants(modified_query, mode)
+        
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            # Unknown or expired session: retrieve for the original query once, then narrow locally
+            result = self.find_grants(original_query, mode)
+            session_id = result.get('metadata', {}).get('session_id')
+            session = self.sessions.get(session_id) if session_id else None
+            if session is None:
+                return result
+        
+        grants = self._apply_narrowing_filters(session['grants'], modified_query)
+        print(f"🔎 Refined session {session_id[:8]} locally: {len(session['grants'])} → {len(grants)} grants")
+        return {
+            'status': 'success',
+            'grants': grants,
+            'clarification': self._check_need_clarification(grants, modified_query),
+            'agent_steps': [
+                'Reused grants from your previous search',
+                'Applied your clarification',
+                'Ranked by relevance'
+            ],
+            'metadata': {
+                'query_used': session['query'],
+                'total_found': len(grants),
+                'mode': mode,
+                'results_source': 'session',
+                'session_id': session_id
+            }
+        }
+    
+    def _apply_narrowing_filters(self, grants, user_input):
+        """Filter and reorder already-ranked grants according to narrowing clarification flags"""
+        if user_input.get('nonDilutiveOnly') or user_input.get('equity_free'):
+            grants = [grant for grant in grants if self._is_non_dilutive(grant)]
+        if user_input.get('geographic_focus') == 'regional' and user_input.get('region') not in (None, '', 'Global'):
+            grants = self._filter_by_region(grants, user_input['region'])
+        if user_input.get('deadline_filter') == 'next_60_days':
+            grants = self._filter_by_deadline(grants, days=60)
+        if user_input.get('boost_relevance'):
+            grants = sorted(grants, key=lambda x: x.get('relevance_score', 0), reverse=True)
+        if user_input.get('limit_results'):
+            grants = grants[:int(user_input['limit_results'])]
+        return grants
+    
+    def _is_non_dilutive(self, grant):
+        """False when the grant text mentions equity, loans or other repayable funding"""
+        text = ' '.join(str(grant.get(field, '')) for field in ('title', 'description', 'eligibility', 'amount')).lower()
+        text = re.sub(r'equity[- ]free|non[- ]?dilutive|no equity|without equity|zero equity', ' ', text)
+        return not re.search(r'\b(equity|loans?|convertible|repayable|dilutive|shares)\b', text)
+    
+    def _filter_by_region(self, grants, region):
+        """
+        Grants whose country is in the region. Known regions are compared as REGION_TERMS
+        categories on both sides; others fall back to the country mentioning the region (or one of its words).
+        """
+        wanted = region_aliases(region)
+        region_lower = region.lower()
+        words = [word for word in re.findall(r'\w+', region_lower) if len(word) > 2]
+        filtered = []
+        for grant in grants:
+            country = str(grant.get('country', ''))
+            if wanted:
+                matches = bool(wanted & region_aliases(country))
+            else:
+                matches = region_lower in country.lower() or any(word in country.lower() for word in words)
+            if matches:
+                filtered.append(grant)
+        return filtered
+    
+    def _filter_by_deadline(self, grants, days=60):
+        """Grants closing within the window, soonest first; undated 'closing soon' grants follow"""
+        today = datetime.now().date()
+        window_end = today + timedelta(days=days)
+        dated, urgent = [], []
+        for grant in grants:
+            deadline = self._parse_deadline(grant.get('deadline'))
+            if deadline is not None:
+                if today <= deadline <= window_end:
+                    dated.append((deadline, grant))
+            elif grant.get('deadline_urgency') == 'urgent':
+                urgent.append(grant)
+        return [grant for _, grant in sorted(dated, key=lambda pair: pair[0])] + urgent
+    
+    def _parse_deadline(self, deadline):
+        """Parse a deadline string into a date, or None for rolling/unrecognized deadlines"""
+        deadline_str = ' '.join(str(deadline or '').split())
+        for fmt in DEADLINE_FORMATS:
+            try:
+                return datetime.strptime(deadline_str, fmt).date()
+            except ValueError:
+                continue
+        return None
+    
     def _fallback_error_response(self, user_input, error=None):
         """Return error response when agent completely fails"""
         return {
@@ -0,0 +1,175 @@
+"""
+Persistent local grant catalog.
+Grants extracted by GrantAgent._explore_grant_portal are stored per portal in
+SQLite, with an FTS5 index over title, description, eligibility, sector and
+country so searches can be answered without crawling.
+"""
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from storage import open_db
+
+# Fields the API returns for a grant; everything else extracted is kept in the JSON blob
+GRANT_FIELDS = ('title', 'amount', 'deadline', 'eligibility', 'description', 'sector',
+                'country', 'source', 'apply_link', 'portal_homepage')
+
+
+class GrantCatalog:
+    """SQLite catalog of harvested grants with a full-text index"""
+
+    def __init__(self, db_filename: str = 'grant_catalog.sqlite3'):
+        self._lock = threading.Lock()
+        self._conn = open_db(db_filename)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS grants (
+                id INTEGER PRIMARY KEY,
+                portal TEXT NOT NULL,
+                grant_key TEXT NOT NULL,
+                title TEXT, amount TEXT, deadline TEXT, eligibility TEXT, description TEXT,
+                sector TEXT, country TEXT, source TEXT, apply_link TEXT, portal_homepage TEXT,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (portal, grant_key)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5(
+                title, description, eligibility, sector, country,
+                content='grants', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS grants_ai AFTER INSERT ON grants BEGIN
+                INSERT INTO grants_fts (rowid, title, description, eligibility, sector, country)
+                VALUES (new.id, new.title, new.description, new.eligibility, new.sector, new.country);
+            END;
+            CREATE TRIGGER IF NOT EXISTS grants_ad AFTER DELETE ON grants BEGIN
+                INSERT INTO grants_fts (grants_fts, rowid, title, description, eligibility, sector, country)
+                VALUES ('delete', old.id, old.title, old.description, old.eligibility, old.sector, old.country);
+            END;
+            CREATE TABLE IF NOT EXISTS portals (
+                name TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                harvested_at REAL NOT NULL,
+                grant_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS portal_failures (
+                name TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                failed_at REAL NOT NULL,
+                reason TEXT
+            );
+        ''')
+        self._conn.commit()
+
+    def record_portal(self, portal: Dict[str, Any], grants: List[Dict[str, Any]]) -> None:
+        """
+        Store the grants just extracted from a portal, replacing that portal's previous set.
+        An empty result only marks the portal as checked and keeps what we already had.
+        """
+        now = time.time()
+        with self._lock:
+            if grants:
+                self._conn.execute('DELETE FROM grants WHERE portal = ?', (portal['name'],))
+                for grant in grants:
+                    key = f"{str(grant.get('title', '')).lower()}_{str(grant.get('source', '')).lower()}"
+                    self._conn.execute(
+                        'INSERT OR IGNORE INTO grants (portal, grant_key, title, amount, deadline, eligibility, '
+                        'description, sector, country, source, apply_link, portal_homepage, data, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (portal['name'], key) + tuple(str(grant.get(f) or '') for f in GRANT_FIELDS)
+                        + (json.dumps(grant, default=str), now),
+                    )
+            count = self._conn.execute('SELECT COUNT(*) FROM grants WHERE portal = ?', (portal['name'],)).fetchone()[0]
+            self._conn.execute(
+                'INSERT OR REPLACE INTO portals (name, url, harvested_at, grant_count) VALUES (?, ?, ?, ?)',
+                (portal['name'], portal['url'], now, count),
+            )
+            self._conn.commit()
+
+    def search(self, terms: Iterable[str], limit: int = 35) -> List[Dict[str, Any]]:
+        """Best-matching grants for any of the terms, ranked by BM25"""
+        tokens = []
+        for term in terms:
+            for token in re.findall(r'\w+', str(term).lower()):
+                if len(token) > 1 and token not in tokens:
+                    tokens.append(token)
+        if not tokens:
+            return []
+        # Quoted prefix terms OR-ed together; quoting keeps FTS5 operators out of user input
+        match = ' OR '.join(f'"{token}"*' for token in tokens)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT g.data FROM grants_fts JOIN grants g ON g.id = grants_fts.rowid '
+                'WHERE grants_fts MATCH ? ORDER BY bm25(grants_fts, 5.0, 2.0, 1.0, 2.0, 2.0) LIMIT ?',
+                (match, limit),
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def portal_grants(self, portal_name: str) -> List[Dict[str, Any]]:
+        """Grants last harvested from one portal (a fallback while the portal is unreachable)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM grants WHERE portal = ? ORDER BY id', (portal_name,)
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def record_failure(self, portal: Dict[str, Any], reason: str = '') -> None:
+        """
+        Mark a portal as checked but unreachable (blocked, 5xx, open circuit).
+        Its previously harvested grants stay; it just isn't retried as if never checked.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO portal_failures (name, url, failed_at, reason) VALUES (?, ?, ?, ?)',
+                (portal['name'], portal['url'], time.time(), reason),
+            )
+            self._conn.commit()
+
+    def portal_status(self, portal_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Last harvest and last failed check per portal (None where there was none)"""
+        names = list(portal_names)
+        if not names:
+            return {}
+        placeholders = ','.join('?' * len(names))
+        with self._lock:
+            harvests = self._conn.execute(
+                f"SELECT name, harvested_at, grant_count FROM portals WHERE name IN ({placeholders})", names
+            ).fetchall()
+            failures = self._conn.execute(
+                f"SELECT name, failed_at, reason FROM portal_failures WHERE name IN ({placeholders})", names
+            ).fetchall()
+        status = {name: {'harvested_at': None, 'grant_count': 0, 'failed_at': None, 'failure_reason': None}
+                  for name in names}
+        for row in harvests:
+            status[row['name']].update(harvested_at=row['harvested_at'], grant_count=row['grant_count'])
+        for row in failures:
+            status[row['name']].update(failed_at=row['failed_at'], failure_reason=row['reason'])
+        return status
+
+    def portal_ages(self, portal_names: Iterable[str]) -> Dict[str, Optional[float]]:
+        """
+        Seconds since each portal was last checked, harvested or found unreachable (None if never).
+        This is catalog freshness; the harvester schedules from portal_status(), where a failure is not a harvest.
+        """
+        now = time.time()
+        ages = {}
+        for name, status in self.portal_status(portal_names).items():
+            checked = [t for t in (status['harvested_at'], status['failed_at']) if t is not None]
+            ages[name] = now - max(checked) if checked else None
+        return ages
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            grants = self._conn.execute('SELECT COUNT(*) FROM grants').fetchone()[0]
+            portals = self._conn.execute('SELECT COUNT(*), MIN(harvested_at) FROM portals').fetchone()
+            # Portals whose latest check failed
+            unreachable = self._conn.execute(
+                'SELECT COUNT(*) FROM portal_failures f LEFT JOIN portals p ON p.name = f.name '
+                'WHERE p.harvested_at IS NULL OR f.failed_at > p.harvested_at'
+            ).fetchone()[0]
+        return {
+            'grants': grants,
+            'portals': portals[0],
+            'unreachable_portals': unreachable,
+            'oldest_harvest_age_sec': round(time.time() - portals[1], 1) if portals[1] else None,
+        }
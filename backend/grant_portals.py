@@ -0,0 +1,195 @@
+"""
+Known grant portals.
+PRIMARY_PORTALS are targeted by query criteria in GrantAgent._identify_grant_portals;
+ADDITIONAL_PORTALS widen the search in GrantAgent._expand_web_search. Each portal
+carries the refresh interval (seconds) the background harvester uses for it.
+"""
+
+# Government and programme sites change slowly; aggregators list new calls daily
+DEFAULT_REFRESH_SEC = 24 * 3600
+AGGREGATOR_REFRESH_SEC = 6 * 3600
+
+PRIMARY_PORTALS = [
+    {
+        'name': 'grants.gov',
+        'url': 'https://www.grants.gov',
+        'regions': ['US', 'North America'],
+        'types': ['government', 'federal', 'research'],
+        'search_patterns': ['/search/', '/find/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'SBIR',
+        'url': 'https://www.sbir.gov',
+        'regions': ['US'],
+        'types': ['small business', 'innovation', 'research'],
+        'search_patterns': ['/funding/', '/opportunities/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'Innovation Norway',
+        'url': 'https://www.innovasjonnorge.no',
+        'regions': ['Norway', 'Europe'],
+        'types': ['innovation', 'startup'],
+        'search_patterns': ['/funding/', '/grants/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'Startup India',
+        'url': 'https://www.startupindia.gov.in',
+        'regions': ['India', 'Asia Pacific'],
+        'types': ['startup', 'innovation'],
+        'search_patterns': ['/funding/', '/schemes/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'Horizon Europe',
+        'url': 'https://ec.europa.eu/info/funding-tenders',
+        'regions': ['Europe', 'EU'],
+        'types': ['research', 'innovation', 'sme'],
+        'search_patterns': ['/opportunities/', '/calls/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'The Grant Portal (International)',
+        'url': 'https://international.thegrantportal.com/',
+        'regions': ['Worldwide'],
+        'types': ['nonprofit', 'small business', 'individual'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'Global Innovation Fund',
+        'url': 'https://www.globalinnovation.fund/apply-for-funding',
+        'regions': ['Global', 'Developing Countries'],
+        'types': ['social impact', 'innovation'],
+        'search_patterns': ['/apply-for-funding'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'CRDF Global – Funding Opportunities',
+        'url': 'https://www.crdfglobal.org/funding-opportunities/',
+        'regions': ['Global'],
+        'types': ['research', 'innovation', 'fellowship'],
+        'search_patterns': ['/funding-opportunities'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'OpenGrants',
+        'url': 'https://opengrants.io/',
+        'regions': ['Global'],
+        'types': ['grant discovery', 'intelligent search'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'Funds for NGOs',
+        'url': 'https://www.fundsforngos.org/',
+        'regions': ['Global', 'Emerging Markets'],
+        'types': ['ngo', 'sustainability', 'development'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'GrantWatch',
+        'url': 'https://www.grantwatch.com/',
+        'regions': ['Global', 'US'],
+        'types': ['nonprofit', 'business', 'individual'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'Start-Up Chile',
+        'url': 'https://startupchile.org/en/apply/',
+        'regions': ['Global', 'Latin America', 'Chile'],
+        'types': ['accelerator', 'equity-free'],
+        'search_patterns': ['/apply/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'K-Startup Grand Challenge',
+        'url': 'https://www.k-startupgc.org/',
+        'regions': ['Global', 'Asia', 'South Korea'],
+        'types': ['accelerator', 'grant'],
+        'search_patterns': ['/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'EU Funding & Tenders Portal',
+        'url': 'https://ec.europa.eu/info/funding-tenders/opportunities/portal/',
+        'regions': ['Europe', 'EU', 'Global'],
+        'types': ['research', 'innovation', 'SME'],
+        'search_patterns': ['/opportunities/portal'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'Cascade Funding Hub',
+        'url': 'https://cascadefunding.eu/',
+        'regions': ['Europe'],
+        'types': ['innovation', 'SME', 'startup'],
+        'search_patterns': ['/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+    {
+        'name': 'UnLtd (UK Social Entrepreneurs)',
+        'url': 'https://www.unltd.org.uk/',
+        'regions': ['UK'],
+        'types': ['social entrepreneurship', 'grants', 'investment'],
+        'search_patterns': ['/'],
+        'refresh_interval': DEFAULT_REFRESH_SEC,
+    },
+]
+
+ADDITIONAL_PORTALS = [
+    {
+        'name': 'GrantSpace',
+        'url': 'https://grantspace.org',
+        'regions': ['Global'],
+        'types': ['foundation', 'nonprofit'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'Foundation Directory Online',
+        'url': 'https://fconline.foundationcenter.org',
+        'regions': ['US', 'Global'],
+        'types': ['foundation'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'GrantWatch',
+        'url': 'https://www.grantwatch.com',
+        'regions': ['Global'],
+        'types': ['government', 'foundation', 'corporate'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'Devex Funding',
+        'url': 'https://www.devex.com/funding',
+        'regions': ['Global'],
+        'types': ['development', 'international'],
+        'search_patterns': ['/funding'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+    {
+        'name': 'OpenGrants',
+        'url': 'https://opengrants.io',
+        'regions': ['Global'],
+        'types': ['research', 'innovation'],
+        'search_patterns': ['/'],
+        'refresh_interval': AGGREGATOR_REFRESH_SEC,
+    },
+]
+
+
+def all_known_portals():
+    """Every portal once (by name), primary portals first"""
+    seen = set()
+    portals = []
+    for portal in PRIMARY_PORTALS + ADDITIONAL_PORTALS:
+        if portal['name'] not in seen:
+            seen.add(portal['name'])
+            portals.append(portal)
+    return portals
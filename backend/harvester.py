@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Background grant harvester.
+Runs GrantAgent._explore_grant_portal for every known portal and writes the
+results to the grant catalog that /process-input answers from, so user-facing
+latency no longer depends on portal response times.
+
+Usage:
+    python harvester.py once [--portal NAME ...] [--workers N]   # harvest due (or named) portals and exit
+    python harvester.py run [--workers N] [--poll SEC] [--jitter FRACTION]   # long-running scheduler
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from custom_portia_tools import CustomBrowserTool, CustomCrawlTool
+from grant_agent import GrantAgent
+from grant_portals import DEFAULT_REFRESH_SEC, all_known_portals
+
+load_dotenv('../.env')
+
+# Generic query used for crawl keywords when no user is asking
+HARVEST_QUERY = "Find startup grants and funding opportunities for innovative companies"
+# Failed portals are retried after this fraction of their refresh interval rather than a full one
+RETRY_FACTOR = 0.1
+
+
+class PortalHarvester:
+    """Refreshes portals into the catalog on per-portal, jittered intervals with a concurrency cap"""
+
+    def __init__(self, agent=None, max_workers=3, jitter=0.1, portals=None):
+        self.agent = agent or GrantAgent()
+        if not self.agent.catalog:
+            raise RuntimeError("Grant catalog is disabled (GRANT_CATALOG_ENABLED=0); nothing to harvest into")
+        self.max_workers = max(1, max_workers)
+        self.jitter = jitter
+        self.portals = portals or all_known_portals()
+        self._next_due = {}
+        self._stop = threading.Event()
+        # Harvests must reflect the portal now: cached pages are revalidated with the origin, never served as-is
+        self.browser = CustomBrowserTool(revalidate=True)
+        self.crawler = CustomCrawlTool(browser=self.browser)
+
+    def _interval(self, portal):
+        """Refresh interval with +/- jitter so portals don't all come due at once"""
+        base = portal.get('refresh_interval', DEFAULT_REFRESH_SEC)
+        return base * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due_portals(self):
+        """Portals whose (jittered) refresh time has passed, never-harvested first"""
+        now = time.time()
+        statuses = self.agent.catalog.portal_status(portal['name'] for portal in self.portals)
+        due = []
+        for portal in self.portals:
+            name = portal['name']
+            if name not in self._next_due:
+                self._next_due[name] = self._first_due(portal, statuses[name], now)
+            if self._next_due[name] <= now:
+                due.append(portal)
+        return sorted(due, key=lambda p: self._next_due[p['name']])
+
+    def _first_due(self, portal, status, now):
+        """
+        When a portal is next due, from the catalog: a full interval after its last harvest,
+        and no sooner than the retry interval after a failed check (which is not a harvest)
+        """
+        interval = self._interval(portal)
+        due = now if status['harvested_at'] is None else status['harvested_at'] + interval
+        if status['failed_at'] is not None:
+            due = max(due, status['failed_at'] + interval * RETRY_FACTOR)
+        return due
+
+    def harvest(self, portals):
+        """Explore portals concurrently; _explore_grant_portal records results in the catalog"""
+        if not portals:
+            return {}
+
+        def explore(portal):
+            start = time.time()
+            self.agent._explore_grant_portal(portal, HARVEST_QUERY, browser=self.browser, crawler=self.crawler)
+            # Exploration never raises and pads failures with synthetic grants,
+            # so success means the catalog recorded this portal during this run
+            status = self.agent.catalog.portal_status([portal['name']])[portal['name']]
+            if status['harvested_at'] is None or status['harvested_at'] < start:
+                reason = status['failure_reason'] if (status['failed_at'] or 0) >= start else None
+                raise RuntimeError(reason or "portal could not be explored")
+            return status['grant_count'], time.time() - start
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(portals)), thread_name_prefix='harvest') as executor:
+            futures = {executor.submit(explore, portal): portal for portal in portals}
+            for future in as_completed(futures):
+                portal = futures[future]
+                try:
+                    count, elapsed = future.result()
+                    results[portal['name']] = count
+                    print(f"🌾 Harvested {portal['name']}: {count} grants in {elapsed:.1f}s")
+                except Exception as e:
+                    results[portal['name']] = None
+                    print(f"⚠️ Harvest failed for {portal['name']}: {e}")
+                # Failed portals are retried after a fraction of their interval rather than immediately
+                retry_factor = 1 if results[portal['name']] is not None else RETRY_FACTOR
+                self._next_due[portal['name']] = time.time() + self._interval(portal) * retry_factor
+        return results
+
+    def run_once(self, names=None):
+        portals = [p for p in self.portals if p['name'] in names] if names else self.due_portals()
+        print(f"🌾 Harvesting {len(portals)} portal(s)")
+        return self.harvest(portals)
+
+    def run_forever(self, poll_interval=60):
+        print(f"🌾 Harvest scheduler started for {len(self.portals)} portals "
+              f"(workers={self.max_workers}, jitter=±{int(self.jitter * 100)}%)")
+        while not self._stop.is_set():
+            due = self.due_portals()
+            if due:
+                self.harvest(due)
+            # Jittered poll so several harvesters don't synchronize
+            self._stop.wait(poll_interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest grant portals into the local catalog")
+    parser.add_argument('command', choices=['once', 'run'])
+    parser.add_argument('--portal', action='append', help="Portal name to harvest (once only; repeatable)")
+    parser.add_argument('--workers', type=int, default=3, help="Portals harvested concurrently")
+    parser.add_argument('--poll', type=float, default=60, help="Seconds between schedule checks (run only)")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Fractional jitter applied to refresh intervals")
+    args = parser.parse_args()
+
+    harvester = PortalHarvester(max_workers=args.workers, jitter=args.jitter)
+    if args.command == 'once':
+        harvester.run_once(args.portal)
+        print(f"📚 Catalog: {harvester.agent.catalog.stats()}")
+    else:
+        try:
+            harvester.run_forever(poll_interval=args.poll)
+        except KeyboardInterrupt:
+            print("🛑 Harvester stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Persistent HTTP response cache for CustomBrowserTool.navigate_to_url.
+Pages are kept in SQLite with a TTL per host. Expired entries are revalidated
+with ETag / Last-Modified conditional GETs, and entries that are only slightly
+stale are served immediately while a background refresh runs.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+from storage import open_db
+
+
+class ResponseCache:
+    """SQLite-backed page cache with per-host TTLs and stale-while-revalidate"""
+
+    def __init__(self, db_filename: str = 'http_cache.sqlite3', default_ttl: Optional[float] = None,
+                 host_ttls: Optional[Dict[str, float]] = None, stale_while_revalidate: Optional[float] = None):
+        # Fresh for 6 h by default; afterwards served stale (and refreshed in the background) for another 24 h
+        self.default_ttl = default_ttl if default_ttl is not None else float(os.getenv('HTTP_CACHE_TTL_SEC', '21600'))
+        self.stale_while_revalidate = (
+            stale_while_revalidate if stale_while_revalidate is not None
+            else float(os.getenv('HTTP_CACHE_SWR_SEC', '86400'))
+        )
+        # Per-host overrides, e.g. HTTP_CACHE_HOST_TTLS='{"www.grants.gov": 3600}'
+        self.host_ttls = host_ttls if host_ttls is not None else json.loads(os.getenv('HTTP_CACHE_HOST_TTLS', '{}'))
+
+        self._lock = threading.Lock()
+        self._conn = open_db(db_filename)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status_code INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+        self._writes = 0
+        self._counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'refreshed': 0,
+            'stores': 0,
+        }
+
+    def ttl_for(self, url: str) -> float:
+        host = urlparse(url).netloc.lower()
+        return float(self.host_ttls.get(host, self.default_ttl))
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry with its freshness state ('fresh', 'stale' or 'expired'), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status_code, text, etag, last_modified, fetched_at FROM responses WHERE url = ?',
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = dict(row)
+        age = time.time() - entry['fetched_at']
+        ttl = self.ttl_for(url)
+        if age <= ttl:
+            entry['state'] = 'fresh'
+        elif age <= ttl + self.stale_while_revalidate:
+            entry['state'] = 'stale'
+        else:
+            entry['state'] = 'expired'
+        return entry
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Validators to send when revalidating a cached entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, status_code: int, text: str, headers: Any) -> None:
+        """Store a successful response along with its validators"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, status_code, text, etag, last_modified, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, status_code, text, headers.get('ETag'), headers.get('Last-Modified'), time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            self._counters['stores'] += 1
+            if self._writes % 100 == 0:
+                self._prune_locked()
+
+    def touch(self, url: str, headers: Any) -> None:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET fetched_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (time.time(), headers.get('ETag'), headers.get('Last-Modified'), url),
+            )
+            self._conn.commit()
+
+    def record(self, event: str) -> None:
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+        counters['entries'] = entries
+        counters['hit_ratio'] = round((counters['hits'] + counters['stale_hits']) / lookups, 3) if lookups else 0.0
+        return counters
+
+    def _prune_locked(self) -> None:
+        """Drop entries too old to be served even as stale (caller holds the lock)"""
+        max_ttl = max([self.default_ttl] + [float(t) for t in self.host_ttls.values()])
+        cutoff = time.time() - (max_ttl + self.stale_while_revalidate)
+        self._conn.execute('DELETE FROM responses WHERE fetched_at < ?', (cutoff,))
+        self._conn.commit()
@@ -0,0 +1,108 @@
+"""
+Background job queue for long-running grant searches.
+A bounded worker pool runs searches off the request threads; clients poll (or
+long-poll) for the result by job id. Queued jobs are capped and finished jobs
+expire after a TTL.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class JobManager:
+    """Runs fn(*args) jobs on a bounded pool and keeps their results for a while"""
+
+    def __init__(self, fn: Callable[..., Any], max_workers: Optional[int] = None,
+                 max_queued: Optional[int] = None, ttl: Optional[float] = None):
+        self.fn = fn
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv('JOB_MAX_WORKERS', '4'))
+        # Jobs waiting for a worker beyond this are rejected instead of queued
+        self.max_queued = max_queued if max_queued is not None else int(os.getenv('JOB_MAX_QUEUED', '20'))
+        # How long a finished job's result stays retrievable
+        self.ttl = ttl if ttl is not None else float(os.getenv('JOB_TTL_SEC', '600'))
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix='job')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+        self._counters = {'submitted': 0, 'rejected': 0, 'completed': 0, 'errors': 0, 'expired': 0}
+
+    def submit(self, *args) -> Optional[Dict[str, Any]]:
+        """Queue a job; None when the queue is full"""
+        with self._changed:
+            self._expire_locked()
+            queued = sum(1 for job in self._jobs.values() if job['status'] == 'queued')
+            if queued >= self.max_queued:
+                self._counters['rejected'] += 1
+                return None
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+            }
+            self._counters['submitted'] += 1
+            snapshot = self._snapshot_locked(job_id)
+        self._executor.submit(self._run, job_id, args)
+        return snapshot
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Job status (and result when finished); waits up to `wait` seconds for it to finish"""
+        with self._changed:
+            self._expire_locked()
+            if job_id not in self._jobs:
+                return None
+            if wait > 0:
+                self._changed.wait_for(
+                    lambda: job_id not in self._jobs or self._jobs[job_id]['status'] in ('done', 'failed'),
+                    timeout=wait,
+                )
+            return self._snapshot_locked(job_id) if job_id in self._jobs else None
+
+    def _run(self, job_id: str, args) -> None:
+        with self._changed:
+            self._jobs[job_id]['status'] = 'running'
+            self._jobs[job_id]['started_at'] = time.time()
+        try:
+            result, error, status = self.fn(*args), None, 'done'
+        except Exception as e:
+            print(f"❌ Job {job_id[:8]} failed: {e}")
+            result, error, status = None, str(e), 'failed'
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+            self._counters['completed' if status == 'done' else 'errors'] += 1
+            self._changed.notify_all()
+
+    def _expire_locked(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and job['finished_at'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._counters['expired'] += len(expired)
+
+    def _snapshot_locked(self, job_id: str) -> Dict[str, Any]:
+        job = dict(self._jobs[job_id])
+        if job['status'] == 'queued':
+            job['queue_position'] = sum(
+                1 for other in self._jobs.values()
+                if other['status'] == 'queued' and other['created_at'] <= job['created_at']
+            )
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            counters = dict(self._counters)
+            for status in ('queued', 'running', 'done', 'failed'):
+                counters[status] = sum(1 for job in self._jobs.values() if job['status'] == status)
+        counters['max_workers'] = self.max_workers
+        counters['max_queued'] = self.max_queued
+        return counters
@@ -0,0 +1,128 @@
+"""
+Precompiled multi-pattern keyword matcher for the classification hot paths.
+All terms are compiled into one trie-shaped regular expression, so a text is
+scanned once however many keywords there are, and every hit comes back with its
+category. Terms match whole words by default ('ai' no longer matches "email");
+a trailing '*' makes a term a prefix ('grant*' matches "grants", "grantee").
+"""
+import re
+import string
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Trie leaf markers: whole-word terms need a right word boundary, prefix terms don't
+_WORD_END = 'word'
+_PREFIX_END = 'prefix'
+
+
+class KeywordMatcher:
+    """One-pass matcher over categorized keywords; categories keep their insertion order as precedence"""
+
+    def __init__(self, patterns: Union[Dict[str, Iterable[str]], Iterable[str]], whole_words: bool = True):
+        if not isinstance(patterns, dict):
+            patterns = {term: [term] for term in patterns}
+        self.whole_words = whole_words
+        # Precedence for first_category(): earlier categories win
+        self.category_rank = {category: rank for rank, category in enumerate(patterns)}
+
+        # term text (as matched, lowercase) -> (term spec, category) pairs
+        self._terms: Dict[str, List[Tuple[str, str]]] = {}
+        ends: Dict[str, str] = {}
+        for category, terms in patterns.items():
+            for spec in terms:
+                spec = spec.lower()
+                text = spec[:-1] if spec.endswith('*') else spec
+                if not text:
+                    continue
+                self._terms.setdefault(text, []).append((spec, category))
+                # A whole-word term and a prefix term on the same text collapse into the prefix
+                if spec.endswith('*') or not whole_words:
+                    ends[text] = _PREFIX_END
+                else:
+                    ends.setdefault(text, _WORD_END)
+
+        body = _trie_regex(ends) if ends else '(?!)'
+        self._regex = re.compile(r'(?<!\w)' + body if whole_words else body)
+        # Shorter terms inside a longer one ('tech' in 'clean tech') count as hits whenever the longer one does
+        self._contained = {text: self._contained_terms(text, ends) for text in self._terms}
+
+    def _contained_terms(self, text: str, ends: Dict[str, str]) -> List[str]:
+        contained = []
+        for other, end in ends.items():
+            if other == text or other not in text:
+                continue
+            left = r'(?<!\w)' if self.whole_words else ''
+            right = r'(?!\w)' if end == _WORD_END else ''
+            if re.search(left + re.escape(other) + right, text):
+                contained.append(other)
+        return contained
+
+    def _hits(self, text: str):
+        """Yield (term spec, category) for every hit in the text, lowercasing it first"""
+        for match in self._regex.finditer(text.lower()):
+            matched = match.group()
+            for term_text in [matched] + self._contained[matched]:
+                yield from self._terms[term_text]
+
+    def scan(self, text: str) -> List[Tuple[str, str]]:
+        """Every (term spec, category) hit, in text order (repeats included)"""
+        return list(self._hits(text or ''))
+
+    def any_in(self, text: str) -> bool:
+        """Whether any term occurs; stops at the first hit"""
+        return bool(text) and self._regex.search(text.lower()) is not None
+
+    def terms_in(self, text: str) -> Set[str]:
+        """Distinct term specs found in the text"""
+        return {spec for spec, _ in self._hits(text or '')}
+
+    def categories_in(self, text: str) -> List[str]:
+        """Distinct categories found in the text, in precedence order"""
+        found = {category for _, category in self._hits(text or '')}
+        return [category for category in self.category_rank if category in found]
+
+    def first_category(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Highest-precedence category with a hit (stops early once the top category is found)"""
+        best = None
+        for _, category in self._hits(text or ''):
+            if best is None or self.category_rank[category] < self.category_rank[best]:
+                best = category
+                if self.category_rank[best] == 0:
+                    break
+        return best if best is not None else default
+
+
+def _trie_regex(ends: Dict[str, str]) -> str:
+    """Prefix-factored alternation so the regex engine walks a trie instead of trying each term in turn"""
+    trie: Dict = {}
+    for text, end in ends.items():
+        node = trie
+        for char in text:
+            node = node.setdefault(char, {})
+        node[''] = end
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        end = node.get('')
+        if end is not None:
+            # Longer continuations are tried first; the term may also end here
+            branches.append(r'(?!\w)' if end == _WORD_END else '')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+@lru_cache(maxsize=256)
+def matcher_for_keywords(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """
+    Cached matcher for one query's keywords: each keyword (punctuation trimmed) is
+    its own category and also matches its plural, so categories_in() counts keywords.
+    """
+    categories: Dict[str, List[str]] = {}
+    for keyword in keywords:
+        keyword = (keyword or '').lower().strip(string.punctuation)
+        if keyword:
+            categories[keyword] = [keyword, keyword + 's']
+    return KeywordMatcher(categories)
@@ -0,0 +1,163 @@
+"""
+Content-addressed cache for OpenAI chat completions.
+Requests are keyed by a hash of the model, messages and sampling parameters.
+An in-process LRU sits in front of a persistent SQLite tier; both expire
+entries by TTL and evict by size, and hit rates are tracked per tier.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from storage import open_db
+from ttl_cache import TTLCache
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + SQLite) store of completion texts keyed by request hash"""
+
+    # Parameters that change the completion; anything else (timeouts, retries) is ignored in the key
+    KEY_PARAMS = ('model', 'messages', 'temperature', 'top_p', 'max_tokens', 'n', 'stop',
+                  'presence_penalty', 'frequency_penalty', 'response_format', 'seed')
+
+    def __init__(self, db_filename: str = 'llm_cache.sqlite3', ttl: Optional[float] = None,
+                 memory_entries: Optional[int] = None, max_disk_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('LLM_CACHE_TTL_SEC', '604800'))
+        self.max_disk_entries = (
+            max_disk_entries if max_disk_entries is not None else int(os.getenv('LLM_CACHE_MAX_ENTRIES', '50000'))
+        )
+        self.memory = TTLCache(
+            max_entries=memory_entries if memory_entries is not None else int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', '2000')),
+            ttl=self.ttl,
+        )
+
+        self._lock = threading.Lock()
+        self._conn = open_db(db_filename)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                content TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)')
+        self._conn.commit()
+        self._writes = 0
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def make_key(self, params: Dict[str, Any]) -> str:
+        keyed = {name: params[name] for name in self.KEY_PARAMS if name in params}
+        blob = json.dumps(keyed, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content, created_at FROM completions WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and row['created_at'] + self.ttl < now:
+                self._conn.execute('DELETE FROM completions WHERE key = ?', (key,))
+                self._conn.commit()
+                row = None
+            if row is not None:
+                self._conn.execute('UPDATE completions SET last_used = ? WHERE key = ?', (now, key))
+                self._conn.commit()
+        if row is None:
+            self._count('misses')
+            return None
+
+        value = {'content': row['content']}
+        # Promote to memory for the rest of its TTL
+        self.memory.set(key, value, ttl=row['created_at'] + self.ttl - now)
+        self._count('disk_hits')
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set(key, value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO completions (key, content, created_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, value.get('content'), now, now),
+            )
+            self._conn.commit()
+            self._counters['stores'] += 1
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        """Drop expired rows, then least recently used rows beyond the size cap (caller holds the lock)"""
+        removed = self._conn.execute('DELETE FROM completions WHERE created_at < ?', (now - self.ttl,)).rowcount
+        count = self._conn.execute('SELECT COUNT(*) FROM completions').fetchone()[0]
+        if count > self.max_disk_entries:
+            removed += self._conn.execute(
+                'DELETE FROM completions WHERE key IN '
+                '(SELECT key FROM completions ORDER BY last_used ASC LIMIT ?)',
+                (count - self.max_disk_entries,),
+            ).rowcount
+        self._conn.commit()
+        self._counters['evictions'] += removed
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            self._counters[event] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters['disk_entries'] = self._conn.execute('SELECT COUNT(*) FROM completions').fetchone()[0]
+        counters['memory_entries'] = len(self.memory)
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        counters['hit_rate'] = round((counters['memory_hits'] + counters['disk_hits']) / lookups, 3) if lookups else 0.0
+        return counters
+
+
+class _CachedCompletions:
+    def __init__(self, completions, cache: LLMResponseCache):
+        self._completions = completions
+        self._cache = cache
+
+    def create(self, **params):
+        key = self._cache.make_key(params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            # Same shape the call sites read: response.choices[0].message.content
+            message = SimpleNamespace(role='assistant', content=cached['content'])
+            return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason='stop')],
+                                   model=params.get('model'), cached=True)
+
+        response = self._completions.create(**params)
+        if not params.get('stream') and params.get('n', 1) == 1:
+            self._cache.set(key, {'content': response.choices[0].message.content})
+        return response
+
+
+class CachedLLMClient:
+    """
+    Drop-in wrapper around an OpenAI client: chat.completions.create() is
+    served from the cache when an identical request was made before.
+    Everything else is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, cache: Optional[LLMResponseCache] = None):
+        self._client = client
+        self.cache = cache or LLMResponseCache()
+        self.chat = SimpleNamespace(completions=_CachedCompletions(client.chat.completions, self.cache))
+
+    def with_options(self, **options) -> 'CachedLLMClient':
+        """Copy of the wrapped client with different request options (timeout, retries), sharing the cache"""
+        return CachedLLMClient(self._client.with_options(**options), cache=self.cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
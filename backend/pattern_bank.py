@@ -0,0 +1,43 @@
+"""
+Prioritized regex bank for field extraction.
+A field (amount, deadline) is described by several patterns in priority order:
+the result is the earliest match of the first pattern that matches anywhere.
+The bank compiles its patterns once, skips texts that cannot match at all, and
+lowercases each text once so the patterns run case-sensitively (much faster in
+the re engine than IGNORECASE); matches are sliced from the original text.
+"""
+import re
+from typing import List, Optional
+
+
+class PatternBank:
+    """Priority-ordered patterns, written in lowercase, matched case-insensitively"""
+
+    def __init__(self, patterns: List[str], gate: Optional[str] = None):
+        self.patterns = list(patterns)
+        # Something every pattern needs (e.g. a digit): texts without it are rejected with one cheap search
+        self._gate = re.compile(gate) if gate else None
+        self._lower = [re.compile(pattern) for pattern in self.patterns]
+        # For texts whose lowercase form changes length, where spans would not line up
+        self._ignorecase = [re.compile(pattern, re.IGNORECASE) for pattern in self.patterns]
+
+    def first(self, text: str) -> Optional[str]:
+        """
+        Same result as trying each pattern's re.search(..., re.IGNORECASE) in
+        priority order: group 1 of the winning pattern if it has groups, else the whole match.
+        """
+        if not text or (self._gate and not self._gate.search(text)):
+            return None
+        lower = text.lower()
+        if len(lower) == len(text):
+            for regex in self._lower:
+                m = regex.search(lower)
+                if m:
+                    group = 1 if regex.groups else 0
+                    return text[m.start(group):m.end(group)]
+            return None
+        for regex in self._ignorecase:
+            m = regex.search(text)
+            if m:
+                return m.group(1) if regex.groups else m.group(0)
+        return None
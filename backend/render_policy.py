@@ -0,0 +1,44 @@
+"""
+Per-domain JavaScript-rendering decisions for ScraperAPI fetches.
+Rendering is several times slower and costlier than a plain proxied fetch, so
+each domain is first fetched without it; only when that page turns out to be an
+empty JS shell is it re-fetched rendered. The outcome is remembered per domain
+until it expires, and rendered / plain fetch counts are tracked.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from ttl_cache import TTLCache
+
+
+class RenderPolicy:
+    """Learned render / don't-render decision per domain, with expiry"""
+
+    def __init__(self, ttl: Optional[float] = None, max_domains: int = 5000):
+        self.ttl = ttl if ttl is not None else float(os.getenv('RENDER_DECISION_TTL_SEC', '604800'))
+        self._decisions = TTLCache(max_entries=max_domains, ttl=self.ttl)
+        self._lock = threading.Lock()
+        self._counters = {'plain_fetches': 0, 'rendered_fetches': 0, 'rerenders': 0,
+                          'learned_plain': 0, 'learned_render': 0}
+
+    def needs_render(self, url: str) -> Optional[bool]:
+        """The domain's learned decision, or None when it still has to be probed"""
+        return self._decisions.get(urlparse(url).netloc.lower())
+
+    def learn(self, url: str, render: bool) -> None:
+        self._decisions.set(urlparse(url).netloc.lower(), render)
+        self.record('learned_render' if render else 'learned_plain')
+
+    def record(self, event: str) -> None:
+        with self._lock:
+            self._counters[event] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters['domains'] = len(self._decisions)
+        fetches = counters['plain_fetches'] + counters['rendered_fetches']
+        counters['render_ratio'] = round(counters['rendered_fetches'] / fetches, 3) if fetches else 0.0
+        return counters
@@ -0,0 +1,101 @@
+"""
+In-memory cache of complete find_grants responses.
+Keyed on the normalized query plus the user fields that change results.
+Entries are fresh for a TTL, then served stale while a background refresh
+runs; the cache is LRU-evicted by entry count and by an approximate memory cap.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class QueryResultCache:
+    """LRU result cache with TTL, stale-while-revalidate and a memory cap"""
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('RESULT_CACHE_TTL_SEC', '900'))
+        # How long past the TTL a result may still be served while it refreshes
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('RESULT_CACHE_STALE_SEC', '3600'))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '256'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('RESULT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'refreshes': 0}
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (a copy of the result, 'fresh' | 'stale'), or (None, None) on a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            age = time.time() - entry['stored_at'] if entry else None
+            if entry is None or age > self.ttl + self.stale_ttl:
+                if entry is not None:
+                    self._remove_locked(key)
+                self._counters['misses'] += 1
+                return None, None
+            self._data.move_to_end(key)
+            state = 'fresh' if age <= self.ttl else 'stale'
+            self._counters['hits' if state == 'fresh' else 'stale_hits'] += 1
+            value = entry['value']
+        return copy.deepcopy(value), state
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove_locked(key)
+            self._data[key] = {'value': copy.deepcopy(value), 'stored_at': time.time(), 'size': size}
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove_locked(oldest)
+                self._counters['evictions'] += 1
+
+    def refresh_in_background(self, key: str, compute: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """Recompute an entry on a daemon thread; concurrent refreshes of the same key collapse into one"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value)
+                    with self._lock:
+                        self._counters['refreshes'] += 1
+            except Exception as e:
+                print(f"⚠️ Background result refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name='result-refresh', daemon=True).start()
+
+    def hit_ratio(self) -> float:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['stale_hits'] + self._counters['misses']
+            served = self._counters['hits'] + self._counters['stale_hits']
+        return round(served / lookups, 3) if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters['entries'] = len(self._data)
+            counters['bytes'] = self._bytes
+        counters['hit_ratio'] = self.hit_ratio()
+        return counters
+
+    def _remove_locked(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry['size']
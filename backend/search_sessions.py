@@ -0,0 +1,55 @@
+"""
+Server-side search sessions.
+Each successful find_grants response opens a session holding its candidate
+grants, so /clarify can narrow that set locally instead of searching again.
+Sessions live in memory with a TTL and are LRU-evicted beyond a size cap.
+"""
+import copy
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ttl_cache import TTLCache
+
+
+class SearchSessionStore:
+    """In-memory sessions of (user input, query, candidate grants) keyed by a random id"""
+
+    def __init__(self, ttl: Optional[float] = None, max_sessions: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('SEARCH_SESSION_TTL_SEC', '1800'))
+        self._sessions = TTLCache(
+            max_entries=max_sessions if max_sessions is not None else int(os.getenv('SEARCH_SESSION_MAX', '1000')),
+            ttl=self.ttl,
+        )
+        self._lock = threading.Lock()
+        self._counters = {'created': 0, 'hits': 0, 'misses': 0}
+
+    def create(self, user_input: Dict[str, Any], mode: str, query: str, grants: List[Dict[str, Any]]) -> str:
+        session_id = uuid.uuid4().hex
+        self._sessions.set(session_id, {
+            'user_input': copy.deepcopy(user_input),
+            'mode': mode,
+            'query': query,
+            'grants': copy.deepcopy(grants),
+            'created_at': time.time(),
+        })
+        self._count('created')
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the session, so callers can filter its grants freely"""
+        session = self._sessions.get(session_id)
+        self._count('hits' if session is not None else 'misses')
+        return copy.deepcopy(session) if session is not None else None
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            self._counters[event] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters['active'] = len(self._sessions)
+        return counters
@@ -0,0 +1,64 @@
+"""
+Single-flight call coalescing.
+Concurrent calls with the same key share one execution: the first caller runs
+the function, later callers block until it finishes and receive the same result
+(or exception). Used for identical searches and identical page fetches.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent in-flight calls per key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() unless a call for key is already in flight; returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._counters['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        completed = False
+        try:
+            call.result = fn()
+            completed = True
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            if not completed and call.error is None:
+                # Interrupted by a BaseException (KeyboardInterrupt, SystemExit, ...): followers must not read None
+                call.error = RuntimeError(f"In-flight call for {key!r} was interrupted")
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters['in_flight'] = len(self._calls)
+        return counters
@@ -0,0 +1,24 @@
+"""
+Local persistent storage helpers shared by GrantScout caches and catalogs.
+Everything lives in one data directory (GRANTSCOUT_DATA_DIR, default backend/.grantscout).
+"""
+import os
+import sqlite3
+
+DATA_DIR = os.getenv(
+    'GRANTSCOUT_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.grantscout'),
+)
+
+
+def open_db(filename: str) -> sqlite3.Connection:
+    """Open (creating if needed) a SQLite database in the data directory.
+
+    The connection may be used from several threads; callers serialize access with their own lock.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(DATA_DIR, filename), timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
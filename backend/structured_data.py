@@ -0,0 +1,143 @@
+"""
+schema.org structured data readers (JSON-LD, microdata, OpenGraph).
+Portals that describe their calls as schema.org Grant / MonetaryGrant / Event
+items carry exactly the fields the heuristic extractor scrapes for, so these
+are read first. Items come back as plain dicts in JSON-LD shape ('@type' plus
+properties), whichever syntax they were embedded in.
+"""
+import json
+from typing import Any, Dict, Iterable, List
+
+from bs4 import BeautifulSoup
+
+# Cheap markers checked against the raw HTML before looking for structured data in the tree
+STRUCTURED_DATA_MARKERS = ('application/ld+json', 'itemtype')
+
+
+def may_contain_structured_data(html: str) -> bool:
+    lower = html.lower()
+    return any(marker in lower for marker in STRUCTURED_DATA_MARKERS)
+
+
+def type_names(node: Dict[str, Any]) -> List[str]:
+    types = node.get('@type') or []
+    if isinstance(types, str):
+        types = [types]
+    # 'https://schema.org/Grant' and 'schema:Grant' both mean Grant
+    return [str(t).rstrip('/').rsplit('/', 1)[-1].rsplit(':', 1)[-1] for t in types]
+
+
+def _walk_json_ld(value: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _walk_json_ld(item)
+    elif isinstance(value, dict):
+        yield value
+        for key, item in value.items():
+            if key != '@context' and isinstance(item, (list, dict)):
+                yield from _walk_json_ld(item)
+
+
+def json_ld_items(soup: BeautifulSoup, types: Iterable[str]) -> List[Dict[str, Any]]:
+    """Nodes of the wanted types from every JSON-LD block, including @graph and nested nodes"""
+    wanted = set(types)
+    items = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or script.get_text() or '')
+        except (ValueError, TypeError):
+            continue
+        for node in _walk_json_ld(data):
+            if wanted.intersection(type_names(node)):
+                items.append(node)
+    return items
+
+
+def _microdata_value(elem) -> Any:
+    if elem.has_attr('itemscope'):
+        return _microdata_item(elem)
+    if elem.has_attr('content'):
+        return elem['content']
+    if elem.name in ('a', 'link', 'area') and elem.has_attr('href'):
+        return elem['href']
+    if elem.name == 'time' and elem.has_attr('datetime'):
+        return elem['datetime']
+    if elem.name in ('data', 'meter') and elem.has_attr('value'):
+        return elem['value']
+    return elem.get_text(' ', strip=True)
+
+
+def _microdata_item(scope) -> Dict[str, Any]:
+    item = {'@type': scope.get('itemtype', '').split()}
+    for prop in scope.find_all(attrs={'itemprop': True}):
+        # Properties of nested items belong to those items
+        owner = prop.find_parent(attrs={'itemscope': True})
+        if owner is not scope:
+            continue
+        for name in prop['itemprop'].split():
+            item.setdefault(name, _microdata_value(prop))
+    return item
+
+
+def microdata_items(soup: BeautifulSoup, types: Iterable[str]) -> List[Dict[str, Any]]:
+    wanted = set(types)
+    items = []
+    for scope in soup.find_all(attrs={'itemscope': True, 'itemtype': True}):
+        item = _microdata_item(scope)
+        if wanted.intersection(type_names(item)):
+            items.append(item)
+    return items
+
+
+def opengraph(soup: BeautifulSoup) -> Dict[str, str]:
+    """og:* meta properties, keyed without the prefix"""
+    properties = {}
+    for meta in soup.find_all('meta', attrs={'property': True, 'content': True}):
+        prop = meta['property']
+        if prop.startswith('og:'):
+            properties.setdefault(prop[3:], meta['content'])
+    return properties
+
+
+def text_value(value: Any) -> str:
+    """A property as display text: first item of a list, a node's name / value, or the string itself"""
+    if isinstance(value, list):
+        return text_value(value[0]) if value else ''
+    if isinstance(value, dict):
+        for key in ('name', '@value', 'audienceType', 'addressCountry', 'address'):
+            if value.get(key):
+                return text_value(value[key])
+        return ''
+    return str(value).strip() if value is not None else ''
+
+
+def _format_number(value: Any) -> str:
+    try:
+        number = float(str(value).replace(',', ''))
+    except ValueError:
+        return str(value)
+    if number != number or number in (float('inf'), float('-inf')):
+        return str(value)
+    return f"{number:,.0f}" if number == int(number) else f"{number:,.2f}"
+
+
+def amount_value(value: Any) -> str:
+    """A MonetaryAmount (a value or a min/max range), plain number or text, as e.g. 'USD 50,000'"""
+    if isinstance(value, list):
+        return amount_value(value[0]) if value else ''
+    if isinstance(value, dict):
+        currency = text_value(value.get('currency'))
+        amount = value.get('value')
+        if isinstance(amount, dict):
+            return amount_value(dict(amount, currency=currency))
+        if amount is not None and amount != '':
+            figure = _format_number(amount)
+        elif value.get('minValue') is not None or value.get('maxValue') is not None:
+            figure = ' - '.join(_format_number(value[key]) for key in ('minValue', 'maxValue')
+                                if value.get(key) is not None)
+        else:
+            return ''
+        return f"{currency} {figure}".strip()
+    if value is None or value == '':
+        return ''
+    return _format_number(value)
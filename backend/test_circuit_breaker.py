@@ -0,0 +1,66 @@
+import time
+
+from circuit_breaker import CircuitBreaker
+
+URL = 'https://portal.example/grants'
+
+
+def _breaker(**overrides):
+    options = dict(failure_rate=0.5, min_requests=4, window=10, open_sec=0.1, slow_call_sec=1.0)
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def _trip(breaker):
+    for _ in range(4):
+        breaker.record(URL, success=False, latency=0.1)
+
+
+def test_opens_once_the_failure_rate_is_reached():
+    breaker = _breaker()
+    for success in (True, False, True):
+        breaker.record(URL, success=success, latency=0.1)
+    assert breaker.allow(URL)
+    breaker.record(URL, success=False, latency=0.1)
+    assert not breaker.allow(URL)
+    snapshot = breaker.snapshot(URL)
+    assert snapshot['state'] == 'open'
+    assert snapshot['rejected'] == 1
+    assert snapshot['retry_in_sec'] is not None
+
+
+def test_slow_successes_count_as_failures():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(URL, success=True, latency=2.0)
+    assert breaker.snapshot(URL)['state'] == 'open'
+
+
+def test_other_hosts_are_unaffected():
+    breaker = _breaker()
+    _trip(breaker)
+    assert breaker.allow('https://other.example/')
+
+
+def test_one_probe_after_cool_down_and_success_closes():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.15)
+    assert breaker.snapshot(URL)['state'] == 'half_open'
+    assert breaker.allow(URL)
+    assert not breaker.allow(URL)
+    breaker.record(URL, success=True, latency=0.1)
+    assert breaker.snapshot(URL)['state'] == 'closed'
+    assert breaker.allow(URL)
+
+
+def test_failed_probe_reopens():
+    breaker = _breaker()
+    _trip(breaker)
+    time.sleep(0.15)
+    assert breaker.allow(URL)
+    breaker.record(URL, success=False, latency=0.1)
+    snapshot = breaker.snapshot(URL)
+    assert snapshot['state'] == 'open'
+    assert snapshot['times_opened'] == 2
+    assert not breaker.allow(URL)
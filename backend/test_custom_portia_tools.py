@@ -0,0 +1,146 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from custom_portia_tools import CrawlFrontier, CustomBrowserTool, HostRateLimiter
+from http_cache import ResponseCache
+
+
+def test_rate_limiter_spaces_requests_queued_behind_a_deferral():
+    limiter = HostRateLimiter(rate=10.0)
+    limiter.defer('https://portal.example/grants', 0.3)
+    started = time.monotonic()
+    fired = []
+    lock = threading.Lock()
+
+    def fetch():
+        limiter.acquire('https://portal.example/grants')
+        with lock:
+            fired.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    fired.sort()
+    assert fired[0] >= 0.28
+    # One request per 1/rate after the block ends, not all at once
+    gaps = [later - earlier for earlier, later in zip(fired, fired[1:])]
+    assert all(gap >= 0.08 for gap in gaps), gaps
+
+
+def test_rate_limiter_deferral_does_not_hold_up_other_hosts():
+    limiter = HostRateLimiter(rate=10.0)
+    limiter.defer('https://slow.example/', 5)
+    assert limiter.acquire('https://fast.example/') == 0
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    """Grant listing with an ETag; conditional requests that match get a 304"""
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        body = b'<html><head><title>Grants</title></head><body><h1>Open calls</h1></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal_url():
+    _PortalHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PortalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/grants"
+    server.shutdown()
+    server.server_close()
+
+
+def _browser(cache, revalidate=False):
+    browser = CustomBrowserTool(rate_limiter=HostRateLimiter(rate=1000.0), cache=cache,
+                                breaker=CircuitBreaker(), revalidate=revalidate)
+    browser.scraper_api_key = None
+    return browser
+
+
+def test_fresh_pages_are_served_from_cache(data_dir, portal_url):
+    browser = _browser(ResponseCache(default_ttl=3600, stale_while_revalidate=0))
+    assert browser.navigate_to_url(portal_url)['title'] == 'Grants'
+    assert browser.navigate_to_url(portal_url)['title'] == 'Grants'
+    assert _PortalHandler.requests_seen == [None]
+
+
+def test_revalidating_browser_checks_cached_pages_with_the_origin(data_dir, portal_url):
+    cache = ResponseCache(default_ttl=3600, stale_while_revalidate=0)
+    _browser(cache).navigate_to_url(portal_url)
+    page = _browser(cache, revalidate=True).navigate_to_url(portal_url)
+    assert page['success'] and page['title'] == 'Grants'
+    # The second fetch was conditional and answered with a 304
+    assert _PortalHandler.requests_seen == [None, '"v1"']
+    assert cache.stats()['revalidated'] == 1
+
+
+def test_stale_pages_are_served_and_refreshed_in_the_background(data_dir, portal_url):
+    cache = ResponseCache(default_ttl=0.05, stale_while_revalidate=3600)
+    browser = _browser(cache)
+    browser.navigate_to_url(portal_url)
+    time.sleep(0.1)
+    assert browser.navigate_to_url(portal_url)['title'] == 'Grants'
+    deadline = time.monotonic() + 2
+    while cache.lookup(portal_url)['state'] != 'fresh' and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert cache.lookup(portal_url)['state'] == 'fresh'
+    assert _PortalHandler.requests_seen == [None, '"v1"']
+
+
+def test_url_spellings_share_one_cache_entry(data_dir, portal_url):
+    browser = _browser(ResponseCache(default_ttl=3600, stale_while_revalidate=0))
+    browser.navigate_to_url(portal_url)
+    browser.navigate_to_url(portal_url + '/?utm_source=newsletter')
+    assert _PortalHandler.requests_seen == [None]
+
+
+def test_frontier_never_holds_more_than_max_size():
+    frontier = CrawlFrontier(max_size=3)
+    pushed = [frontier.push(f'https://portal.example/{i}', score)
+              for i, score in enumerate([5, 1, 7, 3, 0, 9])]
+    assert len(frontier) == 3
+    # The lowest-scoring link just pushed is dropped straight away
+    assert pushed == [True, True, True, True, False, True]
+    assert [frontier.pop() for _ in range(3)] == [
+        'https://portal.example/5', 'https://portal.example/2', 'https://portal.example/0',
+    ]
+
+
+def test_frontier_skips_urls_already_seen():
+    frontier = CrawlFrontier()
+    assert frontier.push('https://portal.example/calls/?utm_source=x', 1)
+    assert not frontier.push('HTTPS://Portal.example/calls', 2)
+    assert len(frontier) == 1
+
+
+def test_frontier_pops_best_first_with_ties_in_discovery_order():
+    frontier = CrawlFrontier()
+    for url, score in [('https://a.example/1', 1), ('https://a.example/2', 3), ('https://a.example/3', 3)]:
+        frontier.push(url, score)
+    assert [frontier.pop() for _ in range(3)] == [
+        'https://a.example/2', 'https://a.example/3', 'https://a.example/1',
+    ]
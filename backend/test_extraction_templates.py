@@ -0,0 +1,37 @@
+from extraction_templates import ExtractionTemplates
+
+
+def _stored_counts(templates, domain):
+    row = templates._conn.execute('SELECT hits, misses FROM templates WHERE domain = ?', (domain,)).fetchone()
+    return row['hits'], row['misses']
+
+
+def test_templates_survive_restarts(data_dir):
+    ExtractionTemplates().learn('portal.example', ['article', '.grant-item'])
+    assert ExtractionTemplates().get('portal.example') == ['article', '.grant-item']
+
+
+def test_every_full_sweep_is_counted(data_dir):
+    templates = ExtractionTemplates()
+    assert templates.get('portal.example') is None
+    templates.learn('portal.example', ['article'])
+    templates.get('portal.example')
+    templates.record('portal.example', hit=False)
+    templates.get('portal.example')
+    templates.record('portal.example', hit=True)
+    stats = templates.stats()
+    assert (stats['sweeps'], stats['hits'], stats['misses']) == (2, 1, 1)
+    assert stats['hit_ratio'] == 0.5
+
+
+def test_hit_and_miss_counts_are_written_in_batches(data_dir):
+    templates = ExtractionTemplates(flush_every=3, flush_interval=3600)
+    templates.learn('portal.example', ['article'])
+    templates.record('portal.example', hit=True)
+    templates.record('portal.example', hit=False)
+    assert _stored_counts(templates, 'portal.example') == (0, 0)
+    templates.record('portal.example', hit=True)
+    assert _stored_counts(templates, 'portal.example') == (2, 1)
+    templates.record('portal.example', hit=True)
+    templates.stats()
+    assert _stored_counts(templates, 'portal.example') == (3, 1)
@@ -0,0 +1,49 @@
+import pytest
+
+from grant_agent import GrantAgent, query_regions, region_aliases
+
+COUNTRIES = [
+    'USA', 'US', 'United States', 'Canada', 'European Union', 'Norway', 'Germany',
+    'United Kingdom', 'India', 'South Korea', 'Global (based in Chile)', 'Kenya, Africa',
+]
+
+
+@pytest.fixture
+def agent():
+    # The filters and clarification handling need no API clients
+    return GrantAgent.__new__(GrantAgent)
+
+
+def _countries(agent, region):
+    grants = [{'title': country, 'country': country} for country in COUNTRIES]
+    return [grant['country'] for grant in agent._filter_by_region(grants, region)]
+
+
+@pytest.mark.parametrize('region, expected', [
+    ('United States', ['USA', 'US', 'United States']),
+    ('North America', ['USA', 'US', 'United States', 'Canada']),
+    ('Europe', ['European Union', 'Norway', 'Germany', 'United Kingdom']),
+    ('Asia Pacific', ['India', 'South Korea']),
+    ('UK', ['United Kingdom']),
+    ('India', ['India']),
+    # No known category: falls back to the country mentioning the region
+    ('Middle East/Africa', ['Kenya, Africa']),
+])
+def test_region_filter_compares_region_aliases(agent, region, expected):
+    assert _countries(agent, region) == expected
+
+
+def test_other_americas_are_not_the_united_states():
+    assert 'us' not in region_aliases('Latin America')
+    assert 'us' in region_aliases('North America')
+
+
+def test_only_the_uppercase_us_token_is_the_country():
+    assert query_regions('Grants for US startups') == ['us']
+    assert query_regions('Help us find grants') == []
+
+
+def test_regional_clarification_sets_geographic_focus(agent):
+    assert agent.apply_clarification({}, 'Focus on just your region')['geographic_focus'] == 'regional'
+    widened = agent.apply_clarification({'region': 'Europe'}, 'Expand to global grants')
+    assert widened['region'] == 'Global' and 'geographic_focus' not in widened
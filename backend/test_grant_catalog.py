@@ -0,0 +1,43 @@
+from grant_catalog import GrantCatalog
+
+PORTAL = {'name': 'Innovation Norway', 'url': 'https://www.innovasjonnorge.no'}
+
+
+def _grant(title, description='', sector='Technology'):
+    return {'title': title, 'description': description, 'sector': sector, 'country': 'Norway',
+            'source': 'www.innovasjonnorge.no'}
+
+
+def test_search_ranks_matches_and_ignores_fts_operators(data_dir):
+    catalog = GrantCatalog()
+    catalog.record_portal(PORTAL, [
+        _grant('Climate grant for startups', 'Funding for clean energy companies'),
+        _grant('Export support', 'Advice for exporters', sector='General'),
+    ])
+    titles = [grant['title'] for grant in catalog.search(['climate', 'startup'])]
+    assert titles == ['Climate grant for startups']
+    assert catalog.search(['"climate" OR NOT*']) != []
+    assert catalog.search(['']) == []
+
+
+def test_a_new_harvest_replaces_the_portals_grants(data_dir):
+    catalog = GrantCatalog()
+    catalog.record_portal(PORTAL, [_grant('Old call')])
+    catalog.record_portal(PORTAL, [_grant('New call')])
+    assert [grant['title'] for grant in catalog.portal_grants(PORTAL['name'])] == ['New call']
+    # An empty harvest keeps what we had
+    catalog.record_portal(PORTAL, [])
+    assert [grant['title'] for grant in catalog.portal_grants(PORTAL['name'])] == ['New call']
+
+
+def test_failed_checks_are_recorded_separately_from_harvests(data_dir):
+    catalog = GrantCatalog()
+    assert catalog.portal_ages([PORTAL['name']]) == {PORTAL['name']: None}
+    catalog.record_failure(PORTAL, 'HTTP 503')
+    status = catalog.portal_status([PORTAL['name']])[PORTAL['name']]
+    assert status['harvested_at'] is None
+    assert status['failure_reason'] == 'HTTP 503'
+    assert catalog.portal_ages([PORTAL['name']])[PORTAL['name']] is not None
+    assert catalog.stats()['unreachable_portals'] == 1
+    catalog.record_portal(PORTAL, [_grant('Call')])
+    assert catalog.stats()['unreachable_portals'] == 0
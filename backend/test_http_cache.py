@@ -0,0 +1,46 @@
+import time
+
+from http_cache import ResponseCache
+
+URL = 'https://portal.example/grants'
+HEADERS = {'ETag': '"v1"', 'Last-Modified': 'Mon, 06 Oct 2025 10:00:00 GMT'}
+
+
+def test_entries_are_fresh_then_stale_then_expired(data_dir):
+    cache = ResponseCache(default_ttl=0.1, stale_while_revalidate=0.2)
+    assert cache.lookup(URL) is None
+    cache.store(URL, 200, '<html>grants</html>', HEADERS)
+    entry = cache.lookup(URL)
+    assert entry['state'] == 'fresh'
+    assert entry['text'] == '<html>grants</html>'
+    time.sleep(0.15)
+    assert cache.lookup(URL)['state'] == 'stale'
+    time.sleep(0.2)
+    assert cache.lookup(URL)['state'] == 'expired'
+
+
+def test_revalidation_uses_the_stored_validators(data_dir):
+    cache = ResponseCache(default_ttl=0.05, stale_while_revalidate=0)
+    cache.store(URL, 200, '<html>grants</html>', HEADERS)
+    time.sleep(0.1)
+    entry = cache.lookup(URL)
+    assert entry['state'] == 'expired'
+    assert cache.conditional_headers(entry) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 06 Oct 2025 10:00:00 GMT',
+    }
+    # A 304 keeps the body and makes the entry fresh again
+    cache.touch(URL, {'ETag': '"v2"'})
+    entry = cache.lookup(URL)
+    assert entry['state'] == 'fresh'
+    assert entry['etag'] == '"v2"'
+    assert entry['text'] == '<html>grants</html>'
+
+
+def test_host_ttls_override_the_default(data_dir):
+    cache = ResponseCache(default_ttl=3600, stale_while_revalidate=0, host_ttls={'portal.example': 0})
+    cache.store(URL, 200, 'x', {})
+    cache.store('https://other.example/', 200, 'y', {})
+    time.sleep(0.01)
+    assert cache.lookup(URL)['state'] == 'expired'
+    assert cache.lookup('https://other.example/')['state'] == 'fresh'
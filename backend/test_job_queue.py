@@ -0,0 +1,38 @@
+import threading
+
+from job_queue import JobManager
+
+
+def test_jobs_run_and_can_be_long_polled():
+    manager = JobManager(lambda x: x * 2, max_workers=1, max_queued=5, ttl=60)
+    job = manager.submit(21)
+    done = manager.get(job['job_id'], wait=2)
+    assert done['status'] == 'done'
+    assert done['result'] == 42
+
+
+def test_failures_are_reported_on_the_job():
+    def fail():
+        raise ValueError('no portals')
+
+    manager = JobManager(fail, max_workers=1, max_queued=5, ttl=60)
+    job = manager.get(manager.submit()['job_id'], wait=2)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'no portals'
+
+
+def test_submissions_beyond_the_queue_cap_are_rejected():
+    release = threading.Event()
+    manager = JobManager(lambda: release.wait(2), max_workers=1, max_queued=1, ttl=60)
+    try:
+        running = manager.submit()
+        manager.get(running['job_id'], wait=0.1)
+        assert manager.submit() is not None
+        assert manager.submit() is None
+        assert manager.stats()['rejected'] == 1
+    finally:
+        release.set()
+
+
+def test_unknown_jobs_return_none():
+    assert JobManager(lambda: None, max_workers=1).get('missing') is None
@@ -0,0 +1,36 @@
+from keyword_matcher import KeywordMatcher, matcher_for_keywords
+
+
+def test_terms_match_whole_words_only():
+    matcher = KeywordMatcher({'ai': ['ai']})
+    assert matcher.any_in('Grants for AI startups')
+    assert not matcher.any_in('Send us an email')
+    assert not matcher.any_in('Paid in full')
+
+
+def test_trailing_star_makes_a_prefix_term():
+    matcher = KeywordMatcher(['grant*'])
+    assert matcher.terms_in('Grants and grantees') == {'grant*'}
+    assert not matcher.any_in('A regranting scheme')
+
+
+def test_categories_keep_insertion_order_as_precedence():
+    matcher = KeywordMatcher({'us': ['usa'], 'europe': ['europe*']})
+    assert matcher.categories_in('Europe and the USA') == ['us', 'europe']
+    assert matcher.first_category('European programmes, also open in the USA') == 'us'
+    assert matcher.first_category('nothing here', default='global') == 'global'
+
+
+def test_shorter_terms_inside_a_longer_hit_are_counted():
+    matcher = KeywordMatcher({'climate': ['clean tech'], 'tech': ['tech']})
+    assert matcher.categories_in('A clean tech fund') == ['climate', 'tech']
+
+
+def test_without_whole_words_terms_match_inside_words():
+    matcher = KeywordMatcher(['grant', 'funding'], whole_words=False)
+    assert matcher.terms_in('/grantsandfunding/') == {'grant', 'funding'}
+
+
+def test_query_keywords_match_their_plurals():
+    matcher = matcher_for_keywords(('startup,', 'Grant'))
+    assert matcher.categories_in('Startups seeking grants') == ['startup', 'grant']
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _start_leader(flight, fn):
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = flight.do('key', fn)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.05)
+    return thread, outcome
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'page'
+
+    leader, outcome = _start_leader(flight, slow)
+    assert flight.do('key', lambda: 'other') == ('page', True)
+    leader.join()
+    assert outcome['result'] == ('page', False)
+    assert len(calls) == 1
+    assert flight.stats()['coalesced'] == 1
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise ValueError('portal down')
+
+    leader, outcome = _start_leader(flight, failing)
+    with pytest.raises(ValueError, match='portal down'):
+        flight.do('key', lambda: 'other')
+    leader.join()
+    assert isinstance(outcome['error'], ValueError)
+
+
+def test_followers_fail_when_the_leader_is_interrupted():
+    flight = SingleFlight()
+
+    def interrupted():
+        time.sleep(0.2)
+        raise KeyboardInterrupt
+
+    leader, outcome = _start_leader(flight, interrupted)
+    with pytest.raises(RuntimeError, match='interrupted'):
+        flight.do('key', lambda: 'other')
+    leader.join()
+    assert isinstance(outcome['error'], KeyboardInterrupt)
+
+
+def test_calls_after_completion_run_again():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == (1, False)
+    assert flight.do('key', lambda: 2) == (2, False)
+    assert flight.stats()['in_flight'] == 0
@@ -0,0 +1,72 @@
+"""
+Wall-clock budget for one grant search.
+A single TimeBudget is created per find_grants call and handed to every stage
+(portal exploration, fetches, retries, LLM scoring). Stages clamp their own
+timeouts to what is left and record themselves as truncated when they stop early.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class TimeBudget:
+    """Deadline shared by all stages and threads of one search; None or <= 0 seconds means unlimited"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.seconds if self.seconds else None
+        self._truncated: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def limited(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float, minimum: float = 0.5) -> float:
+        """`default` clamped to the time left (never below `minimum`, so a last request can still be tried)"""
+        return max(minimum, min(default, self.remaining()))
+
+    def slice(self, fraction: float) -> 'TimeBudget':
+        """
+        Sub-budget for one stage: `fraction` of the time left, so later stages keep
+        a share. Truncations recorded on the slice show up on this budget too.
+        """
+        child = TimeBudget()
+        if self.limited:
+            child.seconds = self.remaining() * fraction
+            child.expires_at = child.started_at + child.seconds
+        child._truncated = self._truncated
+        child._lock = self._lock
+        return child
+
+    def exhaust(self) -> None:
+        """Treat a limited budget as used up now (e.g. a request ran into its budget-clamped timeout)"""
+        if self.limited:
+            self.expires_at = min(self.expires_at, time.monotonic())
+
+    def truncate(self, stage: str) -> None:
+        """Record that `stage` stopped early because the budget ran out"""
+        with self._lock:
+            if stage not in self._truncated:
+                self._truncated.append(stage)
+
+    @property
+    def truncated_stages(self) -> List[str]:
+        with self._lock:
+            return list(self._truncated)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'budget_sec': self.seconds,
+            'elapsed_sec': round(time.monotonic() - self.started_at, 2),
+            'truncated_stages': self.truncated_stages,
+        }
@@ -6,6 +6,51 @@ import ClarificationModal from "./components/ClarificationModal";
 import InterstitialQuestions from "./components/InterstitialQuestions";
 import "./App.css";
 
+// Reads the NDJSON event stream from /process-input/stream, reporting grants as
+// portals finish and after ranking; resolves with the final search result
+const readSearchStream = async (response, onGrants) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let streamedGrants = [];
+  let result = null;
+
+  const handleEvent = (line) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line);
+    if (event.type === "grants") {
+      streamedGrants = [...streamedGrants, ...event.data.grants].map(
+        (grant, i) => ({ ...grant, id: i + 1 })
+      );
+      onGrants(streamedGrants);
+    } else if (event.type === "catalog") {
+      streamedGrants = event.data.grants.map((grant, i) => ({ ...grant, id: i + 1 }));
+      onGrants(streamedGrants);
+    } else if (event.type === "ranked") {
+      onGrants(event.data.grants);
+    } else if (event.type === "done") {
+      result = event.data;
+    } else if (event.type === "error") {
+      throw new Error(event.data.error);
+    }
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.forEach(handleEvent);
+  }
+  handleEvent(buffer);
+
+  if (!result) {
+    throw new Error("Search stream ended early");
+  }
+  return result;
+};
+
 function App() {
   const [grants, setGrants] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -26,6 +71,7 @@ function App() {
   });
   const [clarification, setClarification] = useState(null);
   const [originalQuery, setOriginalQuery] = useState(null);
+  const [searchSessionId, setSearchSessionId] = useState(null);
   const [clarificationLoading, setClarificationLoading] = useState(false);
   const [interstitialAnswers, setInterstitialAnswers] = useState({});
   const [showInterstitialQuestions, setShowInterstitialQuestions] =
@@ -68,19 +114,27 @@ function App() {
     }, 1200);
 
     try {
-      const response = await fetch("http://localhost:5000/process-input", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify(formData),
-      });
+      const response = await fetch(
+        "http://localhost:5000/process-input/stream",
+        {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify(formData),
+        }
+      );
 
       if (!response.ok) {
         throw new Error("Failed to fetch grants");
       }
 
-      const data = await response.json();
+      // Show grants as soon as the first portal answers; the final result replaces them
+      const data = await readSearchStream(response, (streamedGrants) => {
+        setGrants(streamedGrants);
+        setLastFilters(formData);
+      });
+      setSearchSessionId(data.metadata?.session_id || null);
 
       // Check if agent needs clarification
       if (data.clarification && data.clarification.needed) {
@@ -142,6 +196,7 @@ function App() {
           "Content-Type": "application/json",
         },
         body: JSON.stringify({
+          session_id: searchSessionId,
           original_query: originalQuery,
           clarification_choice: choice,
           mode: originalQuery?.mode || "form",
@@ -153,6 +208,9 @@ function App() {
       }
 
       const data = await response.json();
+      if (data.metadata?.session_id) {
+        setSearchSessionId(data.metadata.session_id);
+      }
       setGrants(data.grants || []);
       setLastFilters(originalQuery);
 
@@ -248,6 +306,7 @@ function App() {
     setError(null);
     setClarification(null);
     setOriginalQuery(null);
+    setSearchSessionId(null);
     setAgentProgress((prev) => ({ ...prev, isActive: false, currentStep: 0 }));
   };
 